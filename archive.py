@@ -0,0 +1,186 @@
+import os
+import glob
+
+import db
+from statements import run
+
+ARCHIVE_DIR = os.environ.get('CAFE_ARCHIVE_DIR', '')
+ARCHIVE_AFTER_DAYS = int(os.environ.get('CAFE_ARCHIVE_DAYS', '1'))
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+
+# Таблицы, которые переносятся вместе с заказом, и колонка связи с ним
+ARCHIVE_TABLES = (
+    ('orders', 'id'),
+    ('order_items', 'order_id'),
+    ('kitchen_tickets', 'order_id'),
+)
+
+# SQLite по умолчанию разрешает не больше 10 подключенных баз
+MAX_ATTACHED = 9
+
+# ==================== АРХИВНЫЕ БАЗЫ ====================
+
+# Функции архивов принимают путь к базе точки; без него берется текущая точка
+
+def get_archive_dir(path=None):
+    """Папка архивов базы: CAFE_ARCHIVE_DIR или archive рядом с базой"""
+    return ARCHIVE_DIR or os.path.join(os.path.dirname(path or db.DB) or '.', 'archive')
+
+def get_archive_path(month, path=None):
+    """Путь к архиву месяца 'ГГГГ_ММ' для базы path"""
+    name = os.path.splitext(os.path.basename(path or db.DB))[0]
+    return os.path.join(get_archive_dir(path), f"{name}_{month}.db")
+
+def list_archives(path=None):
+    """Все архивные базы точки по возрастанию месяца"""
+    name = os.path.splitext(os.path.basename(path or db.DB))[0]
+    return sorted(glob.glob(os.path.join(get_archive_dir(path), f"{name}_[0-9][0-9][0-9][0-9]_[0-9][0-9].db")))
+
+def get_columns(cursor, schema, table_name):
+    """Колонки таблицы в подключенной базе"""
+    cursor.execute(f"PRAGMA {schema}.table_info({table_name})")
+    return [col[1] for col in cursor.fetchall()]
+
+def prepare_archive_schema(cursor):
+    """Создать в подключенном архиве таблицы с колонками горячей базы
+
+    Архивные таблицы без ограничений; повторный перенос той же пачки
+    ничего не дублирует, потому что archive_batch сначала удаляет из
+    архива строки переносимых заказов.
+    """
+    for table_name, _ in ARCHIVE_TABLES + (('menu', 'id'),):
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.{table_name} AS SELECT * FROM main.{table_name} WHERE 0")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_orders_id ON orders (id)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_menu_id ON menu (id)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_kitchen_tickets_id ON kitchen_tickets (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_order_items_order ON order_items (order_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_order_items_menu_order ON order_items (menu_id, order_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_orders_time ON orders (order_time)")
+
+# ==================== ПЕРЕНОС ЗАКАЗОВ ====================
+
+def archive_batch(connection, month, order_ids):
+    """Перенести пачку заказов одного месяца в его архив
+
+    Копирование в архив и удаление из горячей базы - одна транзакция над
+    обеими базами: в журнале отката по умолчанию она атомарна, и заказ
+    никогда не оказывается в двух базах сразу (отчет с архивами посчитал
+    бы его дважды). Прежние строки этих заказов в архиве удаляются перед
+    вставкой, поэтому оставшаяся от прерванного переноса копия не
+    удваивает позиции.
+    """
+    path = get_archive_path(month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    cursor = connection.cursor()
+    cursor.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        prepare_archive_schema(cursor)
+        placeholders = ', '.join('?' * len(order_ids))
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Снимок блюд, чтобы отчеты по архиву не зависели от текущего меню
+            menu_columns = ', '.join(get_columns(cursor, 'archive', 'menu'))
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO archive.menu ({menu_columns})
+                SELECT {menu_columns} FROM main.menu
+                WHERE id IN (SELECT menu_id FROM main.order_items WHERE order_id IN ({placeholders}))
+            """, order_ids)
+            
+            for table_name, order_column in ARCHIVE_TABLES:
+                columns = ', '.join(get_columns(cursor, 'archive', table_name))
+                cursor.execute(f"DELETE FROM archive.{table_name} WHERE {order_column} IN ({placeholders})",
+                               order_ids)
+                cursor.execute(f"""
+                    INSERT INTO archive.{table_name} ({columns})
+                    SELECT {columns} FROM main.{table_name} WHERE {order_column} IN ({placeholders})
+                """, order_ids)
+            
+            # Удаляем от зависимых таблиц к заказам
+            for table_name, order_column in reversed(ARCHIVE_TABLES):
+                cursor.execute(f"DELETE FROM main.{table_name} WHERE {order_column} IN ({placeholders})",
+                               order_ids)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("DETACH DATABASE archive")
+
+def archive_orders(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Перенести завершенные и отмененные заказы старше days дней в архивы
+
+    Заказы переносятся пачками по batch_size, каждая пачка - отдельная
+    транзакция, поэтому работу можно прервать и запустить снова, а
+    терминалы блокируются только на время одной пачки.
+    Возвращает {месяц: перенесено заказов}.
+    """
+    connection = db.connect(isolation_level=None)
+    cursor = connection.cursor()
+    moved = {}
+    try:
+        while True:
+            rows = run('archive.next_batch', ARCHIVE_STATUSES + (f'-{int(days)} days', batch_size),
+                       connection=connection).fetchall()
+            if not rows:
+                break
+            
+            by_month = {}
+            for order_id, month in rows:
+                by_month.setdefault(month, []).append(order_id)
+            for month, order_ids in by_month.items():
+                archive_batch(connection, month, order_ids)
+                moved[month] = moved.get(month, 0) + len(order_ids)
+    finally:
+        connection.close()
+    return moved
+
+# ==================== ОТЧЕТЫ С АРХИВАМИ ====================
+
+def collect_archive_reports(connection, path=None):
+    """Частичные отчеты по всем архивам базы path, архивы подключаются через ATTACH
+
+    Архивы подключаются группами, чтобы не упереться в лимит SQLite на
+    количество подключенных баз.
+    """
+    from reports import collect_report
+    
+    cursor = connection.cursor()
+    partials = []
+    paths = list_archives(path)
+    for start in range(0, len(paths), MAX_ATTACHED):
+        schemas = []
+        for i, path in enumerate(paths[start:start + MAX_ATTACHED]):
+            schema = f"archive_{i}"
+            cursor.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+            schemas.append(schema)
+        try:
+            for schema in schemas:
+                partials.append(collect_report(cursor, schema))
+        finally:
+            for schema in schemas:
+                cursor.execute(f"DETACH DATABASE {schema}")
+    return partials
+
+def archiveOrders():
+    """Архивировать старые заказы"""
+    try:
+        days_input = input(f"Архивировать заказы старше скольких дней? (Enter - {ARCHIVE_AFTER_DAYS}): ").strip()
+        days = int(days_input) if days_input else ARCHIVE_AFTER_DAYS
+        if days < 0:
+            print("Количество дней не может быть отрицательным!")
+            input("Нажмите Enter для выхода...")
+            return
+        
+        moved = archive_orders(days)
+        if not moved:
+            print("Заказов для архивации нет.")
+        for month, count in sorted(moved.items()):
+            print(f"- {month}: {count} заказов -> {get_archive_path(month)}")
+    except ValueError:
+        print("Ошибка: введите число!")
+    except Exception as e:
+        print(f"Ошибка при архивации заказов: {e}")
+    input("Нажмите Enter для выхода...")
@@ -0,0 +1,268 @@
+"""Нагрузочный тест: одновременные официанты, экраны кухни/бара и отчеты
+
+Каждый официант в своем потоке проходит жизненный цикл заказа: занимает
+свободный стол (open_order), добавляет блюда, ждет, пока станции
+приготовят тикеты, и закрывает заказ (set_order_status). Потоки кухни
+раскладывают позиции по тикетам и отмечают их готовыми. Владелец
+периодически строит отчет и экспорт. В конце выводятся пропускная
+способность, задержки p50/p95/p99 по операциям и число ошибок блокировки.
+
+По умолчанию тест работает с копией базы во временной папке.
+
+    python bench/load_test.py --waiters 8 --kitchens 2 --duration 30
+    python bench/load_test.py --db js/cafe1.db --wal
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db
+
+# ==================== СТАТИСТИКА ====================
+
+class Stats:
+    """Задержки и ошибки по операциям, общие для всех потоков"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.lock_errors = {}
+        self.errors = {}
+        self.rejected = {}
+        self.orders_completed = 0
+
+    @contextlib.contextmanager
+    def measure(self, operation, expected=()):
+        """Засечь время операции и учесть ошибку блокировки базы
+
+        Исключения из expected - штатный отказ (например, стол занят),
+        они считаются отдельно от ошибок.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except expected:
+            with self.lock:
+                self.rejected[operation] = self.rejected.get(operation, 0) + 1
+            raise
+        except sqlite3.OperationalError as e:
+            bucket = self.lock_errors if 'locked' in str(e) or 'busy' in str(e) else self.errors
+            with self.lock:
+                bucket[operation] = bucket.get(operation, 0) + 1
+            raise
+        except Exception:
+            with self.lock:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+
+def percentile(sorted_values, p):
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+# ==================== РОЛИ ====================
+
+def waiter(stats, stop, seed, tables, dish_ids, max_wait):
+    """Официант: стол -> блюда -> ожидание кухни -> закрытие заказа"""
+    import functions
+    rng = random.Random(seed)
+    connection = sqlite3.connect(db.DB)
+    
+    while not stop.is_set():
+        try:
+            with stats.measure('open_order', functions.OrderError):
+                order_id = functions.open_order(rng.choice(tables))
+        except functions.OrderError:
+            time.sleep(0.01)
+            continue
+        except sqlite3.OperationalError:
+            continue
+        
+        try:
+            for _ in range(rng.randint(1, 4)):
+                with stats.measure('add_item'):
+                    functions.add_order_item(order_id, rng.choice(dish_ids), rng.randint(1, 3))
+            
+            # Ждем, пока все позиции заказа не окажутся в готовых тикетах
+            deadline = time.monotonic() + max_wait
+            while time.monotonic() < deadline and not stop.is_set():
+                with stats.measure('poll_order'):
+                    pending = connection.execute("""
+                        SELECT COUNT(*) FROM order_items oi
+                        LEFT JOIN kitchen_tickets t ON oi.ticket_id = t.id
+                        WHERE oi.order_id = ? AND (t.id IS NULL OR t.status != 'done')
+                    """, (order_id,)).fetchone()[0]
+                if not pending:
+                    break
+                time.sleep(0.02)
+        except (sqlite3.OperationalError, functions.OrderError):
+            pass
+        
+        # Закрываем заказ в любом случае, чтобы стол освободился
+        while True:
+            try:
+                with stats.measure('complete_order'):
+                    functions.set_order_status(order_id, 'completed')
+                with stats.lock:
+                    stats.orders_completed += 1
+                break
+            except sqlite3.OperationalError:
+                continue
+    
+    connection.close()
+
+def kitchen_screen(stats, stop, station):
+    """Экран станции: раскладка позиций, очередь, приготовление тикета"""
+    import kitchen
+    connection = sqlite3.connect(db.DB)
+    
+    while not stop.is_set():
+        try:
+            with stats.measure('route_items'):
+                kitchen.route_pending_items(connection)
+            with stats.measure('station_queue'):
+                tickets = kitchen.get_station_queue(connection, station)
+            if not tickets:
+                time.sleep(0.01)
+                continue
+            with stats.measure('finish_ticket'):
+                kitchen.set_ticket_status(connection, tickets[0].id, 'in_progress')
+                kitchen.set_ticket_status(connection, tickets[0].id, 'done')
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.rollback()
+    
+    connection.close()
+
+def owner(stats, stop, interval):
+    """Владелец: отчет и экспорт заказов раз в interval секунд"""
+    import reports
+    import exporter
+    
+    while not stop.wait(interval):
+        try:
+            with stats.measure('report'):
+                connection = sqlite3.connect(db.DB)
+                reports.collect_report(connection.cursor())
+                connection.close()
+            with stats.measure('export_orders'):
+                exporter.export_table_data('orders', depth=2)
+        except sqlite3.OperationalError:
+            pass
+
+# ==================== ПОДГОТОВКА И ЗАПУСК ====================
+
+def prepare_database(path, tables_count, wal):
+    """Мигрировать базу и досоздать столы и блюда для теста"""
+    db.DB = path
+    db.init_db()
+    
+    connection = sqlite3.connect(path)
+    if wal:
+        connection.execute("PRAGMA journal_mode=WAL")
+    
+    existing = {row[0] for row in connection.execute("SELECT table_number FROM table_status")}
+    for number in range(1, tables_count + 1):
+        if number not in existing:
+            connection.execute("INSERT INTO table_status (table_number) VALUES (?)", (number,))
+    
+    dish_ids = [row[0] for row in connection.execute("SELECT id FROM menu")]
+    if not dish_ids:
+        for title, station in (('Тестовый суп', 'kitchen'), ('Тестовый кофе', 'bar')):
+            connection.execute("INSERT INTO menu (title, price, station) VALUES (?, 100, ?)", (title, station))
+        dish_ids = [row[0] for row in connection.execute("SELECT id FROM menu")]
+    
+    connection.commit()
+    tables = [row[0] for row in connection.execute("SELECT table_number FROM table_status")]
+    connection.close()
+    return tables, dish_ids
+
+def print_report(stats, elapsed):
+    """Вывести итоговую таблицу задержек и ошибок"""
+    print(f"\nДлительность: {elapsed:.1f} с, закрыто заказов: {stats.orders_completed} "
+          f"({stats.orders_completed / elapsed:.1f} в секунду)")
+    print(f"\n{'Операция':<16} {'всего':>7} {'в сек':>8} {'p50 мс':>8} {'p95 мс':>8} "
+          f"{'p99 мс':>8} {'max мс':>8} {'locked':>7} {'ошибки':>7} {'отказы':>7}")
+    print("-" * 94)
+    operations = sorted(set(stats.latencies) | set(stats.lock_errors) | set(stats.errors))
+    for operation in operations:
+        values = sorted(stats.latencies.get(operation, []))
+        print(f"{operation:<16} {len(values):>7} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f} {(values[-1] if values else 0) * 1000:>8.1f} "
+              f"{stats.lock_errors.get(operation, 0):>7} {stats.errors.get(operation, 0):>7} "
+              f"{stats.rejected.get(operation, 0):>7}")
+    print(f"\nОшибок блокировки всего: {sum(stats.lock_errors.values())}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест системы заказов кафе")
+    parser.add_argument('--db', default=db.DB, help="исходная база (по умолчанию текущая точка)")
+    parser.add_argument('--in-place', action='store_true', help="работать с самой базой, а не с копией")
+    parser.add_argument('--waiters', type=int, default=8)
+    parser.add_argument('--kitchens', type=int, default=1, help="экранов кухни (бар - столько же)")
+    parser.add_argument('--owners', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--report-interval', type=float, default=2)
+    parser.add_argument('--max-wait', type=float, default=2, help="сколько официант ждет кухню, с")
+    parser.add_argument('--tables', type=int, default=20, help="минимум столов в базе")
+    parser.add_argument('--wal', action='store_true', help="включить journal_mode=WAL")
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='cafe_load_')
+    path = args.db
+    if not args.in_place:
+        path = os.path.join(workdir, os.path.basename(args.db))
+        if os.path.exists(args.db):
+            shutil.copy(args.db, path)
+    tables, dish_ids = prepare_database(path, max(args.tables, args.waiters), args.wal)
+    
+    import exporter
+    exporter.OUTPUT_DIR = os.path.join(workdir, 'out')
+    
+    print(f"База: {path}")
+    print(f"Официантов: {args.waiters}, экранов кухни и бара: {args.kitchens} + {args.kitchens}, "
+          f"владельцев: {args.owners}, WAL: {'да' if args.wal else 'нет'}")
+    
+    stats = Stats()
+    stop = threading.Event()
+    threads = [threading.Thread(target=waiter, args=(stats, stop, i, tables, dish_ids, args.max_wait))
+               for i in range(args.waiters)]
+    for station in ('kitchen', 'bar'):
+        threads += [threading.Thread(target=kitchen_screen, args=(stats, stop, station))
+                    for _ in range(args.kitchens)]
+    threads += [threading.Thread(target=owner, args=(stats, stop, args.report_interval))
+                for _ in range(args.owners)]
+    
+    # Экспорт печатает сообщения о файлах, в тесте они не нужны
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    
+    print_report(stats, elapsed)
+    if not args.in_place:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
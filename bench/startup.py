@@ -0,0 +1,62 @@
+"""Замер времени запуска терминала
+
+Запускает `python -X importtime -c "import main"` в отдельном процессе,
+суммирует время импорта и сравнивает с бюджетом. Дополнительно проверяет,
+что тяжелые модули (экспорт, json, csv) не загружаются при старте.
+
+    python bench/startup.py
+    STARTUP_BUDGET_MS=30 python bench/startup.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', '50'))
+RUNS = int(os.environ.get('STARTUP_RUNS', '5'))
+
+# Эти модули должны загружаться только при первом использовании
+LAZY_MODULES = ('functions', 'exporter', 'json', 'csv', 'xml.etree.ElementTree')
+
+def measure_import_time():
+    """Суммарное время импорта main в миллисекундах по данным -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    
+    # Формат строки: "import time: self [us] | cumulative | imported package"
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        name = fields[2]
+        # Считаем только модули верхнего уровня, вложенные уже входят в cumulative
+        if name.startswith(' ') and not name.startswith('  '):
+            total_us += int(fields[1])
+    return total_us / 1000
+
+def loaded_lazy_modules():
+    """Список тяжелых модулей, загруженных при импорте main"""
+    check = ("import sys, main; "
+             f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', check], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+def main():
+    timings = sorted(measure_import_time() for _ in range(RUNS))
+    median = timings[len(timings) // 2]
+    eager = loaded_lazy_modules()
+    
+    print(f"Импорт main: медиана {median:.1f} мс, мин {timings[0]:.1f} мс "
+          f"(бюджет {STARTUP_BUDGET_MS:.0f} мс, запусков {RUNS})")
+    if eager:
+        print(f"Загружены при старте: {', '.join(eager)}")
+    
+    ok = median <= STARTUP_BUDGET_MS and not eager
+    print("OK" if ok else "ПРЕВЫШЕН БЮДЖЕТ ЗАПУСКА")
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,524 @@
+import sqlite3
+import os
+
+DEFAULT_DB = 'js/cafe1.db'
+
+# ==================== ТОЧКИ СЕТИ ====================
+
+def parse_locations(text):
+    """Разобрать список точек 'имя=путь;имя=путь' в словарь"""
+    locations = {}
+    for part in text.split(';'):
+        if '=' in part:
+            name, path = part.split('=', 1)
+            locations[name.strip()] = path.strip()
+    return locations
+
+# У каждого кафе своя база. CAFE_LOCATIONS задает все точки сети,
+# CAFE_LOCATION - текущую, CAFE_DB - путь к базе напрямую.
+LOCATIONS = parse_locations(os.environ.get('CAFE_LOCATIONS', '')) or {
+    'cafe1': os.environ.get('CAFE_DB', DEFAULT_DB)
+}
+LOCATION = os.environ.get('CAFE_LOCATION') or next(iter(LOCATIONS))
+if LOCATION not in LOCATIONS:
+    raise ValueError(f"Точка {LOCATION} не указана в CAFE_LOCATIONS")
+DB = os.environ.get('CAFE_DB') or LOCATIONS[LOCATION]
+
+def set_location(name):
+    """Переключить текущую точку
+
+    Модули читают db.DB при каждом обращении к базе, а долгоживущие
+    соединения (statements.get_connection, брони) пересоздаются при
+    смене точки.
+    """
+    global DB, LOCATION
+    if name not in LOCATIONS:
+        raise ValueError(f"Неизвестная точка: {name}")
+    LOCATION = name
+    DB = LOCATIONS[name]
+
+# ==================== СОЕДИНЕНИЯ ====================
+
+# Профилирование запросов (diagnostics.py): включается переменной
+# окружения или из меню администратора, действует на новые соединения
+PROFILE_QUERIES = os.environ.get('CAFE_QUERY_PROFILE') == '1'
+
+def connect(path=None, **kwargs):
+    """Открыть соединение с базой текущей точки (или с path)"""
+    if PROFILE_QUERIES:
+        from diagnostics import ProfiledConnection
+        kwargs.setdefault('factory', ProfiledConnection)
+    return sqlite3.connect(path or DB, **kwargs)
+
+# ==================== ИНИЦИАЛИЗАЦИЯ И МИГРАЦИИ ====================
+
+# Кэши схемы по пути к базе: схема меняется только миграциями
+_structure_cache = {}
+_tables_cache = {}
+_initialized = set()
+
+def execute_script(cursor, script):
+    """Выполнить несколько запросов в текущей транзакции
+
+    executescript сначала фиксирует открытую транзакцию, и миграция
+    выполнялась бы без блокировки run_migrations. Запросы отделяются
+    по sqlite3.complete_statement, поэтому ';' внутри триггеров не мешает.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cursor.execute(statement)
+            statement = ''
+    if statement.strip():
+        cursor.execute(statement)
+
+def migration_base_schema(cursor):
+    """Создать основные таблицы, если база пустая"""
+    execute_script(cursor, """
+        CREATE TABLE IF NOT EXISTS menu (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            price INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_number INTEGER NOT NULL,
+            order_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT NOT NULL DEFAULT 'active'
+        );
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_id INTEGER,
+            menu_id INTEGER,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+            FOREIGN KEY (menu_id) REFERENCES menu(id)
+        );
+        CREATE TABLE IF NOT EXISTS table_status (
+            table_number INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'free',
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    
+    # В старых базах у заказов нет колонки статуса
+    cursor.execute("PRAGMA table_info(orders)")
+    if 'status' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE orders ADD COLUMN status TEXT NOT NULL DEFAULT 'active'")
+    
+    # Столы 1-20 по умолчанию
+    cursor.execute("SELECT COUNT(*) FROM table_status")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("INSERT INTO table_status (table_number) VALUES (?)",
+                           [(number,) for number in range(1, 21)])
+
+def migration_order_indexes(cursor):
+    """Индексы для выборок активных заказов и позиций заказа"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_time ON orders (status, order_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)")
+
+def migration_reservations(cursor):
+    """Количество мест за столами и таблица броней по времени"""
+    cursor.execute("PRAGMA table_info(table_status)")
+    if 'seats' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE table_status ADD COLUMN seats INTEGER NOT NULL DEFAULT 4")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reservations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_number INTEGER NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            guests INTEGER NOT NULL,
+            guest_name TEXT,
+            phone TEXT,
+            status TEXT NOT NULL DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (table_number) REFERENCES table_status(table_number)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reservations_table_time
+        ON reservations (table_number, start_time, end_time)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_start ON reservations (start_time)")
+    
+    # Счетчик изменений броней и мест: по нему индекс броней в памяти
+    # понимает, что его нужно перечитать, не реагируя на изменения заказов
+    execute_script(cursor, """
+        CREATE TABLE IF NOT EXISTS reservations_version (version INTEGER NOT NULL);
+        INSERT INTO reservations_version (version)
+        SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM reservations_version);
+        
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_insert AFTER INSERT ON reservations
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_update AFTER UPDATE ON reservations
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_delete AFTER DELETE ON reservations
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_table_seats_update AFTER UPDATE OF seats ON table_status
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_table_insert AFTER INSERT ON table_status
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_table_delete AFTER DELETE ON table_status
+        BEGIN UPDATE reservations_version SET version = version + 1; END;
+    """)
+
+def migration_kitchen_tickets(cursor):
+    """Станция и время приготовления блюд, тикеты кухни и бара"""
+    cursor.execute("PRAGMA table_info(menu)")
+    menu_columns = [col[1] for col in cursor.fetchall()]
+    if 'station' not in menu_columns:
+        cursor.execute("ALTER TABLE menu ADD COLUMN station TEXT NOT NULL DEFAULT 'kitchen'")
+    if 'prep_minutes' not in menu_columns:
+        cursor.execute("ALTER TABLE menu ADD COLUMN prep_minutes INTEGER NOT NULL DEFAULT 10")
+    if 'course' not in menu_columns:
+        cursor.execute("ALTER TABLE menu ADD COLUMN course INTEGER NOT NULL DEFAULT 2")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kitchen_tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            station TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'new',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            done_at TIMESTAMP,
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_kitchen_tickets_queue
+        ON kitchen_tickets (station, status, created_at)
+    """)
+    
+    cursor.execute("PRAGMA table_info(order_items)")
+    if 'ticket_id' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE order_items ADD COLUMN ticket_id INTEGER REFERENCES kitchen_tickets(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_ticket ON order_items (ticket_id)")
+
+def migration_order_search(cursor):
+    """Индексы поиска по истории заказов и полнотекстовый индекс названий блюд
+
+    Если sqlite собран без FTS5, индекс названий не создается, и поиск
+    по блюдам перебирает меню (search.py).
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_table_time ON orders (table_number, order_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_time ON orders (order_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_menu_order ON order_items (menu_id, order_id)")
+    
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS menu_fts USING fts5(title, content='menu', content_rowid='id')")
+    except sqlite3.OperationalError:
+        return
+    # Индекс хранит только слова, сами названия берутся из menu: триггеры
+    # держат его в соответствии с таблицей
+    execute_script(cursor, """
+        CREATE TRIGGER IF NOT EXISTS menu_fts_insert AFTER INSERT ON menu BEGIN
+            INSERT INTO menu_fts (rowid, title) VALUES (new.id, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS menu_fts_delete AFTER DELETE ON menu BEGIN
+            INSERT INTO menu_fts (menu_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS menu_fts_update AFTER UPDATE OF title ON menu BEGIN
+            INSERT INTO menu_fts (menu_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO menu_fts (rowid, title) VALUES (new.id, new.title);
+        END;
+    """)
+    cursor.execute("INSERT INTO menu_fts (menu_fts) VALUES ('rebuild')")
+
+# Порядок менять нельзя: номер миграции хранится в PRAGMA user_version
+MIGRATIONS = [
+    migration_base_schema,
+    migration_order_indexes,
+    migration_reservations,
+    migration_kitchen_tickets,
+    migration_order_search,
+]
+
+def run_migrations(db):
+    """Применить к базе ещё не выполненные миграции, вернуть их количество
+
+    Каждая миграция выполняется в BEGIN IMMEDIATE, и номер версии
+    перечитывается уже под блокировкой: если терминалы запускаются
+    одновременно, миграцию применит только один из них, остальные
+    увидят новую версию и пропустят её.
+    """
+    cursor = db.cursor()
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= len(MIGRATIONS):
+        return 0
+    
+    applied = 0
+    while True:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if version >= len(MIGRATIONS):
+                db.rollback()
+                return applied
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        applied += 1
+
+def clear_schema_cache():
+    """Сбросить кэш структуры таблиц текущей базы"""
+    _tables_cache.pop(DB, None)
+    for key in [key for key in _structure_cache if key[0] == DB]:
+        del _structure_cache[key]
+
+def init_db():
+    """Инициализация базы данных: миграции и прогрев кэша схемы
+
+    Выполняется один раз за процесс для каждой базы, повторные вызовы
+    ничего не делают.
+    """
+    if DB in _initialized:
+        return
+    try:
+        db = connect()
+        applied = run_migrations(db)
+        db.close()
+    except Exception as e:
+        print(f"Ошибка подключения к БД: {e}")
+        raise
+    
+    if applied:
+        clear_schema_cache()
+    for table_name in get_available_tables():
+        get_table_structure(table_name)
+    
+    _initialized.add(DB)
+    print("База данных подключена успешно")
+
+# ==================== СТРУКТУРА ТАБЛИЦ ====================
+
+def get_table_structure(table_name):
+    """Получить структуру таблицы и информацию о внешних ключах"""
+    cache_key = (DB, table_name)
+    if cache_key in _structure_cache:
+        return _structure_cache[cache_key]
+    
+    db = connect()
+    cursor = db.cursor()
+    
+    # Получаем информацию о колонках
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    
+    # Получаем информацию о внешних ключах
+    cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+    foreign_keys = cursor.fetchall()
+    
+    db.close()
+    
+    # Колонки первичного ключа в порядке их следования в ключе
+    primary_key = [col[1] for col in sorted(columns, key=lambda col: col[5]) if col[5]]
+    
+    structure = _structure_cache[cache_key] = {
+        'columns': [col[1] for col in columns],
+        'foreign_keys': foreign_keys,
+        'primary_key': primary_key
+    }
+    return structure
+
+def get_available_tables():
+    """Получить список всех таблиц в базе данных"""
+    if DB in _tables_cache:
+        return _tables_cache[DB]
+    
+    db = connect()
+    cursor = db.cursor()
+    
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+    rows = cursor.fetchall()
+    
+    # Полнотекстовые индексы и их служебные таблицы - не данные кафе
+    virtual = [name for name, sql in rows if sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    tables = [name for name, _ in rows
+              if not any(name == table or name.startswith(table + '_') for table in virtual)]
+    
+    db.close()
+    _tables_cache[DB] = tables
+    return tables
+
+# ==================== ЗАПРОСЫ К ТАБЛИЦАМ ====================
+
+FILTER_OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE', 'IN')
+DEFAULT_PAGE_SIZE = 500
+
+def normalize_filters(filters):
+    """Привести фильтры к списку (колонка, оператор, значение)
+
+    Принимает словарь {колонка: значение} (равенство, список - IN,
+    None - IS NULL) или список кортежей (колонка, оператор, значение).
+    """
+    if not filters:
+        return []
+    if isinstance(filters, dict):
+        result = []
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                result.append((column, 'IN', list(value)))
+            else:
+                result.append((column, '=', value))
+        return result
+    return [(column, op.upper(), value) for column, op, value in filters]
+
+def keyset_condition(order_by, key_columns, after, descending):
+    """Условие "строго после ключа after" для сортировки по колонке с NULL
+
+    Сравнение строк (col, pk) > (?, ?) дает NULL, если в ключе NULL, и
+    такие страницы теряли строки. sqlite ставит NULL первыми при ASC и
+    последними при DESC, поэтому условие раскрывается по случаям.
+    Возвращает (sql, params).
+    """
+    value, rest = after[0], list(after[1:])
+    op = '<' if descending else '>'
+    pk = f"({', '.join(key_columns)}) {op} ({', '.join('?' * len(key_columns))})"
+    if value is None:
+        if descending:
+            return f"({order_by} IS NULL AND {pk})", rest
+        return f"({order_by} IS NOT NULL OR {pk})", rest
+    if descending:
+        return (f"({order_by} < ? OR {order_by} IS NULL OR ({order_by} = ? AND {pk}))",
+                [value, value] + rest)
+    return f"({order_by} >= ? AND ({order_by} > ? OR {pk}))", [value, value] + rest
+
+def build_select(table_name, columns=None, filters=None, order_by=None,
+                 descending=False, after=None, limit=None):
+    """Собрать параметризованный SELECT по структуре таблицы
+
+    Возвращает (sql, params, columns, key_columns). В конец выборки добавляются
+    колонки ключа пагинации (order_by + первичный ключ или rowid),
+    чтобы следующую страницу можно было получить по значению ключа
+    последней строки, а не через OFFSET.
+    """
+    if table_name not in get_available_tables():
+        raise ValueError(f"Неизвестная таблица: {table_name}")
+    
+    structure = get_table_structure(table_name)
+    known_columns = structure['columns']
+    
+    columns = list(columns) if columns else list(known_columns)
+    for column in columns:
+        if column not in known_columns:
+            raise ValueError(f"В таблице {table_name} нет колонки {column}")
+    
+    if order_by is not None and order_by not in known_columns:
+        raise ValueError(f"В таблице {table_name} нет колонки {order_by}")
+    
+    key_columns = [order_by] if order_by else []
+    key_columns += [col for col in structure['primary_key'] or ['rowid'] if col != order_by]
+    
+    where = []
+    params = []
+    for column, op, value in normalize_filters(filters):
+        if column not in known_columns:
+            raise ValueError(f"В таблице {table_name} нет колонки {column}")
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Недопустимый оператор фильтра: {op}")
+        
+        if op == 'IN':
+            values = list(value)
+            if not values:
+                where.append("0")
+                continue
+            where.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        elif value is None and op in ('=', '!='):
+            where.append(f"{column} IS {'NOT ' if op == '!=' else ''}NULL")
+        else:
+            where.append(f"{column} {op} ?")
+            params.append(value)
+    
+    # Keyset-пагинация: продолжаем строго после ключа последней строки
+    if after is not None:
+        after = after if isinstance(after, (list, tuple)) else (after,)
+        if len(after) != len(key_columns):
+            raise ValueError("Ключ пагинации не соответствует колонкам сортировки")
+        if order_by and order_by not in structure['primary_key']:
+            condition, key_params = keyset_condition(order_by, key_columns[1:], after, descending)
+        else:
+            condition = (f"({', '.join(key_columns)}) {'<' if descending else '>'} "
+                         f"({', '.join('?' * len(key_columns))})")
+            key_params = list(after)
+        where.append(condition)
+        params.extend(key_params)
+    
+    direction = 'DESC' if descending else 'ASC'
+    sql = f"SELECT {', '.join(columns + key_columns)} FROM {table_name}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + ", ".join(f"{col} {direction}" for col in key_columns)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    
+    return sql, params, columns, key_columns
+
+def page_row_factory(columns, last_key):
+    """Фабрика строк страницы query_table
+
+    Строка выборки build_select - выбранные колонки, за ними колонки ключа
+    пагинации. Фабрика возвращает словарь выбранных колонок, а ключ строки
+    кладет в last_key[0]: после чтения страницы там ключ последней строки.
+    """
+    width = len(columns)
+    
+    def make(cursor, row):
+        last_key[0] = row[width:]
+        return dict(zip(columns, row))
+    return make
+
+def query_table(table_name, columns=None, filters=None, order_by=None,
+                descending=False, after=None, limit=DEFAULT_PAGE_SIZE, connection=None):
+    """Получить одну страницу строк таблицы
+
+    Возвращает (rows, next_after): список словарей с выбранными колонками
+    и ключ для запроса следующей страницы (None, если страниц больше нет).
+    connection - соединение вызывающего кода: на нем SQL страниц берется
+    из кэша подготовленных запросов; без него открывается свое на запрос.
+    """
+    sql, params, columns, key_columns = build_select(
+        table_name, columns, filters, order_by, descending, after, limit)
+    
+    last_key = [None]
+    db = connection or connect()
+    try:
+        cursor = db.cursor()
+        cursor.row_factory = page_row_factory(columns, last_key)
+        rows = cursor.execute(sql, params).fetchall()
+    finally:
+        if connection is None:
+            db.close()
+    
+    next_after = None
+    if limit is not None and len(rows) == limit:
+        next_after = tuple(last_key[0])
+    return rows, next_after
+
+def iter_table(table_name, columns=None, filters=None, order_by=None,
+               descending=False, page_size=DEFAULT_PAGE_SIZE, connection=None):
+    """Постранично перебрать строки таблицы, не загружая её целиком
+
+    Все страницы читаются через одно соединение: переданное или открытое
+    на время перебора.
+    """
+    db = connection or connect()
+    try:
+        after = None
+        while True:
+            rows, after = query_table(table_name, columns, filters, order_by,
+                                      descending, after, page_size, db)
+            yield from rows
+            if after is None:
+                break
+    finally:
+        if connection is None:
+            db.close()
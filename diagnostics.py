@@ -0,0 +1,274 @@
+import sqlite3
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import db
+from screen import clear_screen
+
+# Порог и файл журнала медленных запросов
+SLOW_QUERY_MS = float(os.environ.get('CAFE_SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG = os.environ.get('CAFE_SLOW_QUERY_LOG', 'slow_queries.log')
+
+# Служебные команды, для которых план запроса не строится
+NO_PLAN_PREFIXES = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'ATTACH', 'DETACH',
+                    'CREATE', 'ALTER', 'DROP', 'VACUUM', 'EXPLAIN')
+
+# ==================== СБОР ЗАПРОСОВ ====================
+
+# Нормализованный текст запроса -> статистика
+_query_stats = {}
+_stats_lock = threading.Lock()
+
+def normalize_sql(sql):
+    """Привести запрос к одному виду: пробелы и списки IN (?, ?, ...) схлопываются"""
+    sql = ' '.join(sql.split())
+    return re.sub(r"\(\?(?:, \?)+\)", "(?, ...)", sql)
+
+def describe_params(params):
+    """Число и типы параметров запроса для журнала
+
+    Сами значения в журнал не попадают: среди них имена и телефоны гостей.
+    None - пакет параметров executemany.
+    """
+    if params is None:
+        return "пакет параметров"
+    values = list(params.values()) if isinstance(params, dict) else list(params)
+    return f"параметров {len(values)}: {', '.join(type(value).__name__ for value in values)}"
+
+def record_query(sql, params, elapsed, path, count=1, total=None):
+    """Учесть выполнение запроса и записать его в журнал, если он медленный
+
+    Чтение результата (fetch* и перебор курсора) учитывается с count=0:
+    время добавляется к тому же запросу, а число выполнений не меняется.
+    total - время запроса вместе с уже прочитанными строками: запрос,
+    строки которого читаются по одной, попадает в журнал один раз, когда
+    total впервые достигает порога.
+    """
+    key = normalize_sql(sql)
+    with _stats_lock:
+        stats = _query_stats.get(key)
+        if stats is None:
+            stats = _query_stats[key] = {'sql': sql, 'path': path, 'count': 0, 'total': 0.0, 'max': 0.0}
+        stats['count'] += count
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+    
+    total = elapsed if total is None else total
+    if total * 1000 >= SLOW_QUERY_MS and (count or (total - elapsed) * 1000 < SLOW_QUERY_MS):
+        with _stats_lock, open(SLOW_QUERY_LOG, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} | {total * 1000:.1f} мс | {path[0]} | "
+                    f"{key} | {describe_params(params)}\n")
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Курсор, засекающий время запроса: execute и чтение результата
+
+    Строки читаются через fetch* или перебором курсора (for row in
+    cursor); время чтения добавляется к запросу, от которого они получены.
+    """
+
+    def execute(self, sql, parameters=()):
+        self._sql, self._params = sql, parameters
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._total = time.perf_counter() - start
+            record_query(sql, parameters, self._total, self.connection.path)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql, self._params = sql, None
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._total = time.perf_counter() - start
+            record_query(sql, None, self._total, self.connection.path)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if getattr(self, '_sql', None) is not None:
+                elapsed = time.perf_counter() - start
+                self._total += elapsed
+                record_query(self._sql, self._params, elapsed, self.connection.path,
+                             count=0, total=self._total)
+
+    def __next__(self):
+        return self._fetch(super().__next__)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+class ProfiledConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого профилируются"""
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        # Для плана запроса соединение открывается заново с теми же путем и режимом
+        self.path = (path, kwargs.get('uri', False))
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    # Connection.execute создает курсор в обход cursor(), поэтому
+    # сокращенные формы переопределяются явно
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def reset_stats():
+    """Очистить собранную статистику"""
+    with _stats_lock:
+        _query_stats.clear()
+
+# ==================== ПЛАНЫ ЗАПРОСОВ ====================
+
+def explain_query(sql, path):
+    """EXPLAIN QUERY PLAN для запроса, параметры подставляются как NULL
+
+    path - пара (путь к базе, признак URI) из ProfiledConnection.
+
+    Возвращает (строки плана, предупреждения). Предупреждения: полный
+    просмотр таблицы без индекса и временное B-дерево для сортировки,
+    группировки или DISTINCT. Поиск в виртуальной таблице (FTS5) идет
+    по ее собственному индексу и предупреждением не считается.
+    """
+    path, uri = path
+    connection = sqlite3.connect(path, uri=uri)
+    try:
+        params = [None] * sql.count('?')
+        rows = connection.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    finally:
+        connection.close()
+    
+    plan = [row[3] for row in rows]
+    warnings = []
+    for detail in plan:
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'VIRTUAL TABLE INDEX' not in detail:
+            warnings.append(f"полный просмотр: {detail}")
+        elif 'TEMP B-TREE' in detail:
+            warnings.append(f"временное B-дерево: {detail}")
+    return plan, warnings
+
+def inspect_queries():
+    """Планы всех собранных запросов, от самых затратных по общему времени
+
+    Возвращает список словарей: sql, count, total_ms, avg_ms, max_ms,
+    plan, warnings (или error, если план построить нельзя - например,
+    запрос к подключенному через ATTACH архиву).
+    """
+    with _stats_lock:
+        items = [dict(stats, key=key) for key, stats in _query_stats.items()]
+    
+    results = []
+    for stats in sorted(items, key=lambda stats: stats['total'], reverse=True):
+        count = max(stats['count'], 1)
+        result = {
+            'sql': stats['key'],
+            'count': stats['count'],
+            'total_ms': stats['total'] * 1000,
+            'avg_ms': stats['total'] * 1000 / count,
+            'max_ms': stats['max'] * 1000,
+            'plan': [],
+            'warnings': [],
+        }
+        if not stats['key'].upper().startswith(NO_PLAN_PREFIXES):
+            try:
+                result['plan'], result['warnings'] = explain_query(stats['sql'], stats['path'])
+            except sqlite3.Error as e:
+                result['error'] = str(e)
+        results.append(result)
+    return results
+
+# ==================== МЕНЮ ДИАГНОСТИКИ ====================
+
+def showQueryReport():
+    """Показать статистику запросов с планами и предупреждениями"""
+    results = inspect_queries()
+    print(f"\n=== ЗАПРОСЫ ({len(results)}) ===")
+    if not results:
+        print("Запросов пока нет. Включите сбор и поработайте с программой.")
+    for result in results:
+        if result['plan'] and not result['warnings']:
+            mark = "OK"
+        elif result['warnings']:
+            mark = "ВНИМАНИЕ"
+        else:
+            mark = "-"
+        print(f"\n[{mark}] {result['count']} раз, всего {result['total_ms']:.1f} мс, "
+              f"среднее {result['avg_ms']:.2f} мс, макс {result['max_ms']:.2f} мс")
+        print(f"  {result['sql'][:300]}")
+        for detail in result['plan']:
+            print(f"    план: {detail}")
+        for warning in result['warnings']:
+            print(f"    ! {warning}")
+        if 'error' in result:
+            print(f"    план недоступен: {result['error']}")
+    input("\nНажмите Enter для выхода...")
+
+def showSlowQueryLog(lines=30):
+    """Показать последние записи журнала медленных запросов"""
+    print(f"\n=== МЕДЛЕННЫЕ ЗАПРОСЫ (порог {SLOW_QUERY_MS:.0f} мс, {SLOW_QUERY_LOG}) ===")
+    if not os.path.exists(SLOW_QUERY_LOG):
+        print("Журнал пуст.")
+    else:
+        with open(SLOW_QUERY_LOG, encoding='utf-8') as f:
+            for line in f.readlines()[-lines:]:
+                print(line.rstrip())
+    input("\nНажмите Enter для выхода...")
+
+def showStatementCounts():
+    """Показать счетчики запросов каталога statements.py"""
+    from statements import CACHED_STATEMENTS, STATEMENTS, get_statement_counts
+    counts = get_statement_counts()
+    print(f"\n=== КАТАЛОГ ЗАПРОСОВ ({len(STATEMENTS)} запросов, кэш соединения {CACHED_STATEMENTS}) ===")
+    if not counts:
+        print("Запросы каталога еще не выполнялись.")
+    for name, count in counts:
+        print(f"{name:<25} | {count}")
+    input("\nНажмите Enter для выхода...")
+
+def diagnosticsMenu():
+    while True:
+        clear_screen()
+        print("=== ДИАГНОСТИКА ЗАПРОСОВ ===")
+        print(f"Сбор запросов: {'включен' if db.PROFILE_QUERIES else 'выключен'}")
+        print("1. Включить/выключить сбор запросов")
+        print("2. Планы запросов и предупреждения")
+        print("3. Журнал медленных запросов")
+        print("4. Счетчики каталога запросов")
+        print("5. Очистить статистику")
+        print("6. Выход")
+        
+        choice = input("Выберите действие: ")
+        
+        if choice == '1':
+            db.PROFILE_QUERIES = not db.PROFILE_QUERIES
+        elif choice == '2':
+            showQueryReport()
+        elif choice == '3':
+            showSlowQueryLog()
+        elif choice == '4':
+            showStatementCounts()
+        elif choice == '5':
+            from statements import reset_statement_counts
+            reset_stats()
+            reset_statement_counts()
+        elif choice == '6':
+            break
+        else:
+            print("Неверный выбор!")
+            input("Нажмите Enter для продолжения...")
@@ -0,0 +1,588 @@
+import os
+import re
+import json
+import csv
+from contextlib import ExitStack
+from operator import itemgetter
+
+from db import (DEFAULT_PAGE_SIZE, build_select, get_available_tables,
+                get_table_structure, query_table)
+from models import dict_factory
+from statements import get_connection
+
+# Необязательные быстрые JSON-библиотеки, без них работает стандартный json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+OUTPUT_DIR = 'out'
+
+# ==================== СИСТЕМА ЭКСПОРТА ДАННЫХ ====================
+
+def ensure_output_dir():
+    """Создать папку out если её нет"""
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+        print(f"Создана папка {OUTPUT_DIR}")
+
+def parse_filter_input(text):
+    """Разобрать фильтры вида 'колонка>=значение; колонка=значение'"""
+    filters = []
+    for part in text.split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.match(r"^(\w+)\s*(>=|<=|!=|=|<|>)\s*(.*)$", part)
+        if not match:
+            raise ValueError(f"Не удалось разобрать фильтр: {part}")
+        filters.append(match.groups())
+    return filters
+
+# ==================== СВЯЗИ МЕЖДУ ТАБЛИЦАМИ ====================
+
+RELATION_BATCH_SIZE = 500
+
+def get_reverse_foreign_keys(table_name):
+    """Найти внешние ключи других таблиц, ссылающиеся на таблицу"""
+    reverse_keys = []
+    for other_table in get_available_tables():
+        for fk in get_table_structure(other_table)['foreign_keys']:
+            if fk[2] == table_name:
+                reverse_keys.append((other_table, fk))
+    return reverse_keys
+
+def build_relation_plan(table_name, depth, came_from=None):
+    """Построить дерево связей таблицы на заданную глубину
+
+    Каждая связь - словарь: key (имя поля в записи), table, from_column
+    (колонка текущей записи), to_column (колонка связанной таблицы),
+    many (обратная связь - список записей), columns и children.
+    Связь, по которой пришли на этот уровень, обратно не раскрывается.
+    """
+    if depth <= 0:
+        return []
+    
+    structure = get_table_structure(table_name)
+    plan = []
+    
+    # Прямые связи: order_items.menu_id -> menu.id
+    for fk in structure['foreign_keys']:
+        related_table = fk[2]
+        related_structure = get_table_structure(related_table)
+        to_column = fk[4] or related_structure['primary_key'][0]
+        link = (related_table, to_column, table_name, fk[3])
+        if came_from == link:
+            continue
+        plan.append({
+            'key': related_table,
+            'table': related_table,
+            'from_column': fk[3],
+            'to_column': to_column,
+            'many': False,
+            'columns': related_structure['columns'],
+            'children': build_relation_plan(related_table, depth - 1,
+                                            (table_name, fk[3], related_table, to_column))
+        })
+    
+    # Обратные связи: orders.id <- order_items.order_id
+    for child_table, fk in get_reverse_foreign_keys(table_name):
+        from_column = fk[4] or structure['primary_key'][0]
+        link = (child_table, fk[3], table_name, from_column)
+        if came_from == link:
+            continue
+        plan.append({
+            'key': child_table,
+            'table': child_table,
+            'from_column': from_column,
+            'to_column': fk[3],
+            'many': True,
+            'columns': get_table_structure(child_table)['columns'],
+            'children': build_relation_plan(child_table, depth - 1,
+                                            (table_name, from_column, child_table, fk[3]))
+        })
+    
+    return plan
+
+def get_related_data(cursor, relation, values, memo):
+    """Получить связанные строки для набора значений ключа
+
+    Прямые связи (many=False) запоминаются в memo: одно блюдо встречается
+    во многих позициях и читается из базы один раз за экспорт. Строки
+    обратной связи у каждой родительской записи свои, поэтому они
+    читаются для текущей страницы и в memo не попадают - иначе к концу
+    экспорта в памяти оказались бы все дочерние строки таблицы.
+    Запрашиваются пачками через IN. Возвращает {значение: [строки]}.
+    """
+    if relation['many']:
+        cache = {}
+    else:
+        cache = memo.setdefault((relation['table'], relation['to_column']), {})
+    missing = list({value for value in values if value is not None and value not in cache})
+    
+    columns = relation['columns']
+    to_column = relation['to_column']
+    cursor.row_factory = dict_factory(columns)
+    for i in range(0, len(missing), RELATION_BATCH_SIZE):
+        batch = missing[i:i + RELATION_BATCH_SIZE]
+        for value in batch:
+            cache[value] = []
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM {relation['table']} "
+            f"WHERE {to_column} IN ({', '.join('?' * len(batch))})",
+            batch)
+        for row in cursor.fetchall():
+            cache[row[to_column]].append(row)
+    
+    return cache
+
+def expand_relations(cursor, records, plan, memo):
+    """Раскрыть связи для пачки записей по плану связей"""
+    for relation in plan:
+        from_column = relation['from_column']
+        cache = get_related_data(cursor, relation,
+                                 [record.get(from_column) for record in records], memo)
+        
+        # Записи из memo копируются: вложенные связи дописываются в копию
+        related_records = []
+        for record in records:
+            rows = cache.get(record.get(from_column))
+            if not rows:
+                continue
+            if relation['many']:
+                value = [row.copy() for row in rows]
+                related_records.extend(value)
+            else:
+                value = rows[0].copy()
+                related_records.append(value)
+            record[relation['key']] = value
+        
+        if relation['children'] and related_records:
+            expand_relations(cursor, related_records, relation['children'], memo)
+
+def iter_export_records(table_name, columns=None, filters=None, order_by=None,
+                        depth=1, page_size=DEFAULT_PAGE_SIZE, plan=None):
+    """Лениво выдавать записи таблицы с раскрытыми связями
+
+    Связи раскрываются постранично по мере чтения: общий memo на весь
+    экспорт хранит записи прямых связей, строки обратных связей читаются
+    для каждой страницы заново и освобождаются вместе с ней.
+    """
+    if plan is None:
+        plan = build_relation_plan(table_name, depth)
+    memo = {}
+    
+    # Соединение потока из каталога: SQL страниц и связей, собранный один
+    # раз, остается подготовленным в его кэше
+    connection = get_connection()
+    cursor = connection.cursor()
+    after = None
+    while True:
+        records, after = query_table(table_name, columns, filters, order_by,
+                                     after=after, limit=page_size, connection=connection)
+        expand_relations(cursor, records, plan, memo)
+        yield from records
+        if after is None:
+            break
+
+def export_table_data(table_name, columns=None, filters=None, order_by=None, depth=1,
+                      json_lines=False):
+    """Экспортировать данные таблицы в различные форматы
+
+    Все файлы пишутся за один проход по записям: каждая запись сразу
+    уходит во все форматы, в памяти держится только текущая страница.
+    Возвращает количество экспортированных записей.
+    """
+    ensure_output_dir()
+    
+    # Таблица, колонки и фильтры проверяются до открытия файлов: open
+    # обрезает прежний экспорт, и опечатка в колонке стерла бы его
+    build_select(table_name, columns, filters, order_by)
+    
+    # Получаем структуру таблицы и план связей
+    structure = get_table_structure(table_name)
+    columns = list(columns) if columns else structure['columns']
+    plan = build_relation_plan(table_name, depth)
+    
+    with ExitStack() as stack:
+        def open_output(extension, mode='w', **kwargs):
+            filename = os.path.join(OUTPUT_DIR, f"{table_name}.{extension}")
+            if 'b' not in mode:
+                kwargs.setdefault('encoding', 'utf-8')
+            return stack.enter_context(open(filename, mode, **kwargs))
+        
+        writers = [
+            jsonl_writer(open_output('jsonl', 'wb', buffering=JSON_BUFFER_SIZE)) if json_lines
+            else json_writer(open_output('json', 'wb', buffering=JSON_BUFFER_SIZE)),
+            csv_writer(open_output('csv', newline=''), columns, plan),
+            xml_writer(open_output('xml', errors='xmlcharrefreplace', buffering=XML_BUFFER_SIZE),
+                       table_name),
+            txt_writer(open_output('txt'), table_name),
+        ]
+        
+        # Постранично читаем только нужные строки и колонки
+        count = 0
+        for record in iter_export_records(table_name, columns, filters, order_by, plan=plan):
+            for write, _ in writers:
+                write(record)
+            count += 1
+        for _, finish in writers:
+            finish()
+    
+    print(f"Данные таблицы '{table_name}' экспортированы в папку {OUTPUT_DIR}/")
+    return count
+
+# ==================== ФОРМАТЫ ====================
+# Каждый формат - писатель (write(record), finish()) поверх открытого
+# файла: export_table_data передает запись во все форматы сразу, а
+# export_to_* пишут один формат из любого итерируемого набора записей.
+
+def write_all(writer, data):
+    """Записать все записи data писателем формата и завершить файл"""
+    write, finish = writer
+    for item in data:
+        write(item)
+    finish()
+
+JSON_BUFFER_SIZE = 1 << 16
+
+def get_json_serializer():
+    """Выбрать самый быстрый доступный сериализатор: объект -> bytes в UTF-8
+
+    Порядок: orjson, ujson, стандартный json с компактными разделителями.
+    Значения, которые JSON не поддерживает, записываются через str().
+    """
+    if orjson is not None:
+        return lambda obj: orjson.dumps(obj, default=str)
+    if ujson is not None:
+        return lambda obj: ujson.dumps(obj, ensure_ascii=False, default=str).encode('utf-8')
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+    return lambda obj: encoder.encode(obj).encode('utf-8')
+
+def json_writer(f, serializer=None):
+    """Писатель JSON (массив записей, по одной записи на строке) в двоичный файл"""
+    dumps = serializer or get_json_serializer()
+    separator = b'[\n'
+    
+    def write(item):
+        nonlocal separator
+        f.write(separator)
+        f.write(dumps(item))
+        separator = b',\n'
+    
+    def finish():
+        f.write(b'[]\n' if separator == b'[\n' else b'\n]\n')
+    
+    return write, finish
+
+def export_to_json(data, table_name, serializer=None):
+    """Экспорт в JSON"""
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.json")
+    with open(filename, 'wb', buffering=JSON_BUFFER_SIZE) as f:
+        write_all(json_writer(f, serializer), data)
+
+def jsonl_writer(f, serializer=None):
+    """Писатель JSON Lines: одна запись - одна строка"""
+    dumps = serializer or get_json_serializer()
+    
+    def write(item):
+        f.write(dumps(item))
+        f.write(b'\n')
+    
+    return write, lambda: None
+
+def export_to_jsonl(data, table_name, serializer=None):
+    """Экспорт в JSON Lines"""
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.jsonl")
+    with open(filename, 'wb', buffering=JSON_BUFFER_SIZE) as f:
+        write_all(jsonl_writer(f, serializer), data)
+
+def compile_csv_flattener(columns, plan, prefix=''):
+    """Собрать функцию, превращающую запись с раскрытыми связями в строку CSV
+
+    Заголовок и функции-геттеры строятся один раз по плану связей:
+    колонки записи читаются через itemgetter, прямая связь дает колонки
+    {связь}.{колонка}, а у обратной связи (списка записей) значения каждой
+    колонки объединяются через '; '. Возвращает (header, flatten).
+    """
+    header = [prefix + col for col in columns]
+    if len(columns) == 1:
+        column = columns[0]
+        parts = [lambda record: (record[column],)]
+    else:
+        parts = [itemgetter(*columns)]
+    
+    for relation in plan:
+        sub_header, sub_flatten = compile_csv_flattener(
+            relation['columns'], relation['children'], f"{prefix}{relation['key']}.")
+        header.extend(sub_header)
+        parts.append(compile_relation_getter(relation['key'], relation['many'],
+                                             sub_flatten, len(sub_header)))
+    
+    def flatten(record):
+        row = []
+        for part in parts:
+            row.extend(part(record))
+        return row
+    
+    return header, flatten
+
+def compile_relation_getter(key, many, sub_flatten, width):
+    """Собрать геттер значений одной связи для плоской строки CSV"""
+    empty = ('',) * width
+    
+    if not many:
+        def get_one(record):
+            value = record.get(key)
+            return empty if value is None else sub_flatten(value)
+        return get_one
+    
+    def get_many(record):
+        items = record.get(key)
+        if not items:
+            return empty
+        rows = [sub_flatten(item) for item in items]
+        return ['; '.join('' if value is None else str(value) for value in column)
+                for column in zip(*rows)]
+    return get_many
+
+def csv_writer(f, columns, plan):
+    """Писатель CSV: заголовок сразу, затем по строке на запись"""
+    header, flatten = compile_csv_flattener(columns, plan)
+    writer = csv.writer(f)
+    writer.writerow(header)
+    writerow = writer.writerow
+    return (lambda record: writerow(flatten(record))), (lambda: None)
+
+def export_to_csv(data, table_name, columns, plan):
+    """Экспорт в CSV"""
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.csv")
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        write_all(csv_writer(f, columns, plan), data)
+
+XML_BUFFER_SIZE = 1 << 16
+
+# Кэш готовых строк тегов: имя -> (открывающий, закрывающий, пустой)
+_xml_tags = {}
+
+def xml_tags(name):
+    """Получить заранее собранные строки тегов для имени элемента"""
+    tags = _xml_tags.get(name)
+    if tags is None:
+        tags = _xml_tags[name] = (f"<{name}>", f"</{name}>", f"<{name} />")
+    return tags
+
+def escape_xml_text(text):
+    """Экранировать текст элемента так же, как это делает ElementTree"""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+def xml_writer(f, table_name):
+    """Писатель XML
+
+    Документ пишется потоково, по записи за раз, в том же виде, который
+    раньше давал ElementTree.write, без построения дерева в памяти.
+    """
+    f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+    root_open, root_close, root_empty = xml_tags(table_name)
+    has_records = False
+    
+    def write(item):
+        nonlocal has_records
+        if not has_records:
+            f.write(root_open)
+            has_records = True
+        parts = []
+        dict_to_xml(item, parts, 'record')
+        f.write(''.join(parts))
+    
+    def finish():
+        f.write(root_close if has_records else root_empty)
+    
+    return write, finish
+
+def export_to_xml(data, table_name):
+    """Экспорт в XML"""
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.xml")
+    with open(filename, 'w', encoding='utf-8', errors='xmlcharrefreplace',
+              buffering=XML_BUFFER_SIZE) as f:
+        write_all(xml_writer(f, table_name), data)
+
+def dict_to_xml(data, parts, name):
+    """Рекурсивно записать словарь элементом name в список строк XML"""
+    open_tag, close_tag, empty_tag = xml_tags(name)
+    if not data:
+        parts.append(empty_tag)
+        return
+    
+    parts.append(open_tag)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            dict_to_xml(value, parts, key)
+        elif isinstance(value, list):
+            container_open, container_close, container_empty = xml_tags(key)
+            if not value:
+                parts.append(container_empty)
+                continue
+            parts.append(container_open)
+            for item in value:
+                if isinstance(item, dict):
+                    dict_to_xml(item, parts, 'item')
+                else:
+                    text = str(item)
+                    parts.append(f"<item>{escape_xml_text(text)}</item>" if text else "<item />")
+            parts.append(container_close)
+        else:
+            text = str(value) if value is not None else ""
+            if text:
+                key_open, key_close, _ = xml_tags(key)
+                parts.append(key_open)
+                parts.append(escape_xml_text(text))
+                parts.append(key_close)
+            else:
+                parts.append(xml_tags(key)[2])
+    parts.append(close_tag)
+
+def txt_writer(f, table_name):
+    """Писатель текстового формата"""
+    f.write(f"Данные таблицы: {table_name}\n")
+    f.write("=" * 50 + "\n\n")
+    number = 0
+    
+    def write(item):
+        nonlocal number
+        number += 1
+        f.write(f"Запись #{number}:\n")
+        f.write("-" * 30 + "\n")
+        write_dict_to_txt(item, f, 1)
+        f.write("\n")
+    
+    return write, lambda: None
+
+def export_to_txt(data, table_name):
+    """Экспорт в текстовый формат"""
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.txt")
+    with open(filename, 'w', encoding='utf-8') as f:
+        write_all(txt_writer(f, table_name), data)
+
+def write_dict_to_txt(data, file, indent_level):
+    """Рекурсивно записать словарь в текстовый файл"""
+    indent = "  " * indent_level
+    for key, value in data.items():
+        if isinstance(value, dict):
+            file.write(f"{indent}{key}:\n")
+            write_dict_to_txt(value, file, indent_level + 1)
+        elif isinstance(value, list):
+            file.write(f"{indent}{key}:\n")
+            for item in value:
+                if isinstance(item, dict):
+                    write_dict_to_txt(item, file, indent_level + 1)
+                else:
+                    file.write(f"{indent}  - {item}\n")
+        else:
+            file.write(f"{indent}{key}: {value}\n")
+            
+def export_to_yaml(data, table_name):
+    """
+    Экспорт данных в формат YAML (упрощенная версия без datetime)
+    """
+    filename = os.path.join(OUTPUT_DIR, f"{table_name}.yaml")
+    
+    try:
+        import yaml
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            # Создаем структуру YAML с метаинформацией
+            yaml_structure = {
+                'table_name': table_name,
+                'total_records': len(data),
+                'records': data
+            }
+            
+            # Используем Dumper с русской кодировкой и красивым форматированием
+            yaml.dump(
+                yaml_structure,
+                f,
+                default_flow_style=False,
+                allow_unicode=True,
+                sort_keys=False,
+                indent=2
+            )
+        
+        print(f"  - {table_name}.yaml")
+        
+    except Exception as e:
+        print(f"Ошибка при экспорте в YAML: {e}")
+
+def export_data_menu():
+    """Меню экспорта данных"""
+    ensure_output_dir()
+    
+    tables = get_available_tables()
+    
+    print("=== ЭКСПОРТ ДАННЫХ ИЗ БАЗЫ ДАННЫХ ===")
+    print("Доступные таблицы:")
+    for i, table in enumerate(tables, 1):
+        print(f"{i}. {table}")
+    
+    try:
+        choice = int(input("\nВыберите номер таблицы для экспорта: "))
+    except ValueError:
+        print("Ошибка: введите число!")
+        input("\nНажмите Enter для выхода...")
+        return
+    
+    try:
+        if 1 <= choice <= len(tables):
+            selected_table = tables[choice - 1]
+            print(f"\nЭкспорт данных из таблицы: {selected_table}")
+            
+            structure = get_table_structure(selected_table)
+            print(f"Колонки: {', '.join(structure['columns'])}")
+            
+            if structure['foreign_keys']:
+                print("Связи с другими таблицами:")
+                for fk in structure['foreign_keys']:
+                    print(f"  - {fk[3]} -> {fk[2]}.{fk[4]}")
+            
+            columns_input = input("\nКолонки через запятую (Enter - все): ").strip()
+            columns = [col.strip() for col in columns_input.split(',') if col.strip()] or None
+            filters = parse_filter_input(
+                input("Фильтр, например order_time>=2025-11-21; status=active (Enter - без фильтра): "))
+            
+            depth_input = input("Глубина связей (0 - без связей, Enter - 1): ").strip()
+            if depth_input and not depth_input.isdigit():
+                raise ValueError("глубина связей должна быть числом")
+            depth = int(depth_input) if depth_input else 1
+            
+            json_lines = input("JSON Lines вместо JSON? (y/N): ").strip().lower() == 'y'
+            
+            count = export_table_data(selected_table, columns, filters, depth=depth,
+                                      json_lines=json_lines)
+            
+            print(f"\nЭкспортировано записей: {count}")
+            print(f"Файлы созданы в папке: {OUTPUT_DIR}/")
+            print(f"   - {selected_table}.{'jsonl' if json_lines else 'json'}")
+            print(f"   - {selected_table}.csv") 
+            print(f"   - {selected_table}.xml")
+            print(f"   - {selected_table}.txt")
+            
+        else:
+            print("Неверный выбор!")
+    except ValueError as e:
+        # Неизвестная колонка, оператор или неразобранный фильтр
+        print(f"Ошибка: {e}")
+    except Exception as e:
+        print(f"Ошибка при экспорте: {e}")
+    
+    input("\nНажмите Enter для выхода...")
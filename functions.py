@@ -1,364 +1,99 @@
-import sqlite3
-import os
-import json
-import csv
-import xml.etree.ElementTree as ET
-
-DB = 'js/cafe1.db'
-OUTPUT_DIR = 'out'
-
-# ==================== СИСТЕМА ЭКСПОРТА ДАННЫХ ====================
-
-def ensure_output_dir():
-    """Создать папку out если её нет"""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"Создана папка {OUTPUT_DIR}")
-
-def get_table_structure(table_name):
-    """Получить структуру таблицы и информацию о внешних ключах"""
-    db = sqlite3.connect(DB)
-    cursor = db.cursor()
-    
-    # Получаем информацию о колонках
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = cursor.fetchall()
-    
-    # Получаем информацию о внешних ключах
-    cursor.execute(f"PRAGMA foreign_key_list({table_name})")
-    foreign_keys = cursor.fetchall()
-    
-    db.close()
-    
-    return {
-        'columns': [col[1] for col in columns],
-        'foreign_keys': foreign_keys
-    }
-
-def get_related_data(foreign_key_info, main_row_id):
-    """Получить связанные данные по внешнему ключу"""
-    db = sqlite3.connect(DB)
-    cursor = db.cursor()
-    
-    related_table = foreign_key_info[2]
-    from_column = foreign_key_info[3]
-    to_column = foreign_key_info[4]
-    
-    # Получаем все колонки связанной таблицы
-    cursor.execute(f"PRAGMA table_info({related_table})")
-    related_columns = [col[1] for col in cursor.fetchall()]
-    
-    # Получаем связанные данные
-    cursor.execute(f"SELECT * FROM {related_table} WHERE {to_column} = ?", (main_row_id,))
-    related_rows = cursor.fetchall()
-    
-    db.close()
-    
-    if not related_rows:
-        return None
-    
-    # Преобразуем в список словарей
-    result = []
-    for row in related_rows:
-        row_dict = {}
-        for i, col_name in enumerate(related_columns):
-            row_dict[col_name] = row[i]
-        result.append(row_dict)
-    
-    return result[0] if len(result) == 1 else result
-
-def export_table_data(table_name):
-    """Экспортировать данные таблицы в различные форматы"""
-    ensure_output_dir()
-    
-    db = sqlite3.connect(DB)
-    cursor = db.cursor()
-    
-    # Получаем структуру таблицы
-    structure = get_table_structure(table_name)
-    columns = structure['columns']
-    foreign_keys = structure['foreign_keys']
-    
-    # Получаем все данные из таблицы
-    cursor.execute(f"SELECT * FROM {table_name}")
-    rows = cursor.fetchall()
-    
-    # Преобразуем в список словарей с учетом связей
-    data = []
-    for row in rows:
-        row_dict = {}
-        
-        # Основные данные
-        for i, col_name in enumerate(columns):
-            row_dict[col_name] = row[i]
-        
-        # Добавляем связанные данные
-        for fk in foreign_keys:
-            from_column = fk[3]
-            related_table = fk[2]
-            
-            if from_column in row_dict:
-                related_data = get_related_data(fk, row_dict[from_column])
-                if related_data:
-                    row_dict[related_table] = related_data
-        
-        data.append(row_dict)
-    
-    db.close()
-    
-    # Экспорт в различные форматы
-    export_to_json(data, table_name)
-    export_to_csv(data, table_name, columns, foreign_keys)
-    export_to_xml(data, table_name)
-    export_to_txt(data, table_name)
-    
-    print(f"Данные таблицы '{table_name}' экспортированы в папку {OUTPUT_DIR}/")
-    return data
-
-def export_to_json(data, table_name):
-    """Экспорт в JSON"""
-    filename = os.path.join(OUTPUT_DIR, f"{table_name}.json")
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-
-def export_to_csv(data, table_name, columns, foreign_keys):
-    """Экспорт в CSV"""
-    filename = os.path.join(OUTPUT_DIR, f"{table_name}.csv")
-    
-    # Собираем все возможные колонки для CSV
-    all_columns = columns.copy()
-    
-    # Добавляем колонки из связанных таблиц
-    for fk in foreign_keys:
-        related_table = fk[2]
-        all_columns.extend([f"{related_table}_{col}" for col in get_table_structure(related_table)['columns']])
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=all_columns)
-        writer.writeheader()
-        
-        for row in data:
-            # Создаем плоскую структуру для CSV
-            flat_row = {}
-            
-            # Основные данные
-            for col in columns:
-                flat_row[col] = row.get(col, '')
-            
-            # Данные из связанных таблиц
-            for fk in foreign_keys:
-                related_table = fk[2]
-                if related_table in row:
-                    related_data = row[related_table]
-                    if isinstance(related_data, dict):
-                        for key, value in related_data.items():
-                            flat_row[f"{related_table}_{key}"] = value
-                    elif isinstance(related_data, list):
-                        flat_row[related_table] = '; '.join(str(item) for item in related_data)
-            
-            writer.writerow(flat_row)
-
-def export_to_xml(data, table_name):
-    """Экспорт в XML"""
-    filename = os.path.join(OUTPUT_DIR, f"{table_name}.xml")
-    
-    root = ET.Element(table_name)
-    
-    for item in data:
-        record = ET.SubElement(root, "record")
-        dict_to_xml(item, record)
-    
-    tree = ET.ElementTree(root)
-    tree.write(filename, encoding='utf-8', xml_declaration=True)
-
-def dict_to_xml(data, parent_element):
-    """Рекурсивно преобразовать словарь в XML"""
-    for key, value in data.items():
-        if isinstance(value, dict):
-            child = ET.SubElement(parent_element, key)
-            dict_to_xml(value, child)
-        elif isinstance(value, list):
-            container = ET.SubElement(parent_element, key)
-            for item in value:
-                if isinstance(item, dict):
-                    item_element = ET.SubElement(container, "item")
-                    dict_to_xml(item, item_element)
-                else:
-                    ET.SubElement(container, "item").text = str(item)
-        else:
-            element = ET.SubElement(parent_element, key)
-            element.text = str(value) if value is not None else ""
-
-def export_to_txt(data, table_name):
-    """Экспорт в текстовый формат"""
-    filename = os.path.join(OUTPUT_DIR, f"{table_name}.txt")
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"Данные таблицы: {table_name}\n")
-        f.write("=" * 50 + "\n\n")
-        
-        for i, item in enumerate(data, 1):
-            f.write(f"Запись #{i}:\n")
-            f.write("-" * 30 + "\n")
-            write_dict_to_txt(item, f, 1)
-            f.write("\n")
-
-def write_dict_to_txt(data, file, indent_level):
-    """Рекурсивно записать словарь в текстовый файл"""
-    indent = "  " * indent_level
-    for key, value in data.items():
-        if isinstance(value, dict):
-            file.write(f"{indent}{key}:\n")
-            write_dict_to_txt(value, file, indent_level + 1)
-        elif isinstance(value, list):
-            file.write(f"{indent}{key}:\n")
-            for item in value:
-                if isinstance(item, dict):
-                    write_dict_to_txt(item, file, indent_level + 1)
-                else:
-                    file.write(f"{indent}  - {item}\n")
-        else:
-            file.write(f"{indent}{key}: {value}\n")
-            
-def export_to_yaml(data, table_name):
-    """
-    Экспорт данных в формат YAML (упрощенная версия без datetime)
-    """
-    filename = os.path.join(OUTPUT_DIR, f"{table_name}.yaml")
-    
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            # Создаем структуру YAML с метаинформацией
-            yaml_structure = {
-                'table_name': table_name,
-                'total_records': len(data),
-                'records': data
-            }
-            
-            # Используем Dumper с русской кодировкой и красивым форматированием
-            yaml.dump(
-                yaml_structure,
-                f,
-                default_flow_style=False,
-                allow_unicode=True,
-                sort_keys=False,
-                indent=2
-            )
-        
-        print(f"  - {table_name}.yaml")
-        
-    except Exception as e:
-        print(f"Ошибка при экспорте в YAML: {e}")
-
-def get_available_tables():
-    """Получить список всех таблиц в базе данных"""
-    db = sqlite3.connect(DB)
-    cursor = db.cursor()
-    
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-    tables = [table[0] for table in cursor.fetchall()]
-    
-    db.close()
-    return tables
-
-def export_data_menu():
-    """Меню экспорта данных"""
-    ensure_output_dir()
-    
-    tables = get_available_tables()
-    
-    print("=== ЭКСПОРТ ДАННЫХ ИЗ БАЗЫ ДАННЫХ ===")
-    print("Доступные таблицы:")
-    for i, table in enumerate(tables, 1):
-        print(f"{i}. {table}")
-    
-    try:
-        choice = int(input("\nВыберите номер таблицы для экспорта: "))
-        if 1 <= choice <= len(tables):
-            selected_table = tables[choice - 1]
-            print(f"\nЭкспорт данных из таблицы: {selected_table}")
-            
-            structure = get_table_structure(selected_table)
-            print(f"Колонки: {', '.join(structure['columns'])}")
-            
-            if structure['foreign_keys']:
-                print("Связи с другими таблицами:")
-                for fk in structure['foreign_keys']:
-                    print(f"  - {fk[3]} -> {fk[2]}.{fk[4]}")
-            
-            data = export_table_data(selected_table)
-            
-            print(f"\nЭкспортировано записей: {len(data)}")
-            print(f"Файлы созданы в папке: {OUTPUT_DIR}/")
-            print(f"   - {selected_table}.json")
-            print(f"   - {selected_table}.csv") 
-            print(f"   - {selected_table}.xml")
-            print(f"   - {selected_table}.txt")
-            
-        else:
-            print("Неверный выбор!")
-    except ValueError:
-        print("Ошибка: введите число!")
-    except Exception as e:
-        print(f"Ошибка при экспорте: {e}")
-    
-    input("\nНажмите Enter для выхода...")
+from models import MenuItem, Order, OrderLine, TableStatus
+from screen import clear_screen, page_rows, write_lines
+from statements import ORDER_KEY_START, get_connection, run
 
 # ==================== ОСНОВНАЯ СИСТЕМА КАФЕ ====================
 
-def init_db():
-    """Инициализация базы данных - только проверка соединения"""
-    try:
-        db = sqlite3.connect(DB)
-        db.close()
-        print("База данных подключена успешно")
-    except Exception as e:
-        print(f"Ошибка подключения к БД: {e}")
-        raise
-
 def update_table_status(table_number, status):
     """Обновить статус стола"""
     try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        c.execute("""
-            UPDATE table_status 
-            SET status = ?, last_updated = CURRENT_TIMESTAMP 
-            WHERE table_number = ?
-        """, (status, table_number))
-        db.commit()
-        db.close()
+        with get_connection():
+            run('table.set_status', (status, table_number))
         return True
     except Exception as e:
         print(f"Ошибка при обновлении статуса стола: {e}")
         return False
 
+def table_exists(table_number):
+    """Проверить, что стол с таким номером есть в зале"""
+    return run('table.exists', (table_number,)).fetchone() is not None
+
+# ==================== ОПЕРАЦИИ С ЗАКАЗАМИ ====================
+# Неинтерактивные операции: их вызывают экраны ролей, нагрузочный тест и
+# любой будущий API. Каждая операция - одна транзакция на соединении потока:
+# with get_connection() фиксирует ее или откатывает при ошибке.
+
+ORDER_STATUSES = ('active', 'completed', 'cancelled')
+
+class OrderError(Exception):
+    """Операцию с заказом нельзя выполнить (текст ошибки - для экрана)"""
+
+def open_order(table_number):
+    """Создать заказ для свободного стола и занять стол, вернуть номер заказа"""
+    with get_connection():
+        if run('table.occupy', (table_number,)).rowcount == 0:
+            if not run('table.exists', (table_number,)).fetchone():
+                raise OrderError(f"стол #{table_number} не существует")
+            raise OrderError(f"стол #{table_number} уже занят или забронирован")
+        
+        return run('order.insert', (table_number,)).lastrowid
+
+def add_order_item(order_id, dish_id, quantity):
+    """Добавить блюдо в активный заказ, вернуть название блюда"""
+    if quantity <= 0:
+        raise OrderError("количество должно быть положительным числом")
+    
+    with get_connection():
+        order = run('order.status', (order_id,)).fetchone()
+        if not order:
+            raise OrderError("заказ не найден")
+        if order[0] != 'active':
+            raise OrderError("нельзя добавить блюдо в завершенный заказ")
+        
+        dish = run('menu.title', (dish_id,)).fetchone()
+        if not dish:
+            raise OrderError("блюдо не найдено")
+        
+        run('order_item.insert', (order_id, dish_id, quantity))
+        return dish[0]
+
+def set_order_status(order_id, status):
+    """Изменить статус заказа; завершенный или отмененный заказ освобождает стол
+
+    Статус заказа и стола меняются в одной транзакции. Возвращает номер стола.
+    """
+    if status not in ORDER_STATUSES:
+        raise OrderError(f"неизвестный статус заказа: {status}")
+    
+    with get_connection():
+        order = run('order.table', (order_id,)).fetchone()
+        if not order:
+            raise OrderError("заказ не найден")
+        
+        run('order.set_status', (status, order_id))
+        if status in ('completed', 'cancelled'):
+            run('table.set_status', ('free', order[0]))
+        return order[0]
+
+def render_table_status(table):
+    """Строка стола для экрана статусов"""
+    status_ru = {
+        'free': 'Свободен',
+        'occupied': 'Занят',
+        'reserved': 'Бронь'
+    }.get(table.status, table.status)
+    return [f"{table.table_number:<8} | {table.seats:<4} | {status_ru:<11} | {table.last_updated}"]
+
 def show_table_status():
     """Показать статусы всех столов"""
     try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        c.execute("""
-            SELECT table_number, status, last_updated 
-            FROM table_status 
-            ORDER BY table_number
-        """)
-        
-        tables = c.fetchall()
-        print("\n=== СТАТУСЫ СТОЛОВ ===")
-        print("№ Стола | Статус      | Последнее обновление")
-        print("-" * 50)
-        
-        for table in tables:
-            status_ru = {
-                'free': 'Свободен',
-                'occupied': 'Занят',
-                'reserved': 'Бронь'
-            }.get(table[1], table[1])
-            
-            print(f"{table[0]:<8} | {status_ru:<11} | {table[2]}")
-        
-        db.close()
+        page_rows(lambda after: run('table.list', (after,), model=TableStatus),
+                  key=lambda table: table.table_number,
+                  render_row=render_table_status,
+                  header=["", "=== СТАТУСЫ СТОЛОВ ===",
+                          "№ Стола | Мест | Статус      | Последнее обновление",
+                          "-" * 57],
+                  start=0)
     except Exception as e:
         print(f"Ошибка при получении статусов столов: {e}")
 
@@ -367,8 +102,8 @@ def change_table_status():
     try:
         show_table_status()
         table_number = int(input("\nВведите номер стола: "))
-        if table_number < 1 or table_number > 20:
-            print("Ошибка: номер стола должен быть от 1 до 20!")
+        if not table_exists(table_number):
+            print(f"Ошибка: стол #{table_number} не существует!")
             input("Нажмите Enter для выхода...")
             return
             
@@ -398,19 +133,18 @@ def change_table_status():
         print(f"Ошибка при изменении статуса стола: {e}")
     input("Нажмите Enter для выхода...")
 
+def show_menu_items(title):
+    """Вывести меню постранично под заголовком title"""
+    page_rows(lambda after: run('menu.list', (after,), model=MenuItem),
+              key=lambda item: item.id,
+              render_row=lambda item: [f"{item.id:<2} | {item.title:<20} | {item.price} руб."],
+              header=["", title, "ID | Название            | Цена", "-" * 40],
+              start=0)
+
 def showMenu():
     """Показать меню"""
     try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        c.execute("SELECT id, title, price FROM menu ORDER BY id")
-        items = c.fetchall()
-        print("\n=== МЕНЮ КАФЕ ===")
-        print("ID | Название            | Цена")
-        print("-" * 40)
-        for row in items:
-            print(f"{row[0]:<2} | {row[1]:<20} | {row[2]} руб.")
-        db.close()
+        show_menu_items("=== МЕНЮ КАФЕ ===")
     except Exception as e:
         print(f"Ошибка при получении меню: {e}")
     input("\nНажмите Enter для выхода...")
@@ -429,15 +163,20 @@ def createDish():
             print("Цена должна быть положительным числом!")
             input("Нажмите Enter для выхода...")
             return
+        
+        station = 'bar' if input("Станция (1 - кухня, 2 - бар): ").strip() == '2' else 'kitchen'
+        prep_minutes = int(input("Время приготовления, мин: ") or 10)
+        course = int(input("Подача (1 - сразу, 2 - основное, 3 - десерт): ") or 2)
+        if prep_minutes < 0 or course not in (1, 2, 3):
+            print("Неверное время приготовления или подача!")
+            input("Нажмите Enter для выхода...")
+            return
             
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        c.execute("INSERT INTO menu (title, price) VALUES (?, ?)", (title, price))
-        db.commit()
-        db.close()
+        with get_connection():
+            run('menu.insert', (title, price, station, prep_minutes, course))
         print(f"Блюдо '{title}' успешно добавлено в меню!")
     except ValueError:
-        print("Ошибка: цена должна быть числом!")
+        print("Ошибка: цена, время и подача должны быть числами!")
     except Exception as e:
         print(f"Ошибка при добавлении блюда: {e}")
     input("Нажмите Enter для выхода...")
@@ -448,32 +187,19 @@ def deleteDish():
         showMenu()
         dish_id = int(input("\nВведите ID блюда для удаления: "))
         
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("SELECT title FROM menu WHERE id = ?", (dish_id,))
-        dish = c.fetchone()
+        dish = run('menu.title', (dish_id,)).fetchone()
         if not dish:
             print("Блюдо с таким ID не найдено!")
-            db.close()
             input("Нажмите Enter для выхода...")
             return
         
-        c.execute("""
-            SELECT oi.id FROM order_items oi
-            JOIN orders o ON oi.order_id = o.id
-            WHERE oi.menu_id = ? AND o.status = 'active'
-        """, (dish_id,))
-        
-        if c.fetchone():
+        if run('menu.in_active_orders', (dish_id,)).fetchone():
             print("Нельзя удалить блюдо, которое есть в активных заказах!")
-            db.close()
             input("Нажмите Enter для выхода...")
             return
         
-        c.execute("DELETE FROM menu WHERE id = ?", (dish_id,))
-        db.commit()
-        db.close()
+        with get_connection():
+            run('menu.delete', (dish_id,))
         print(f"Блюдо '{dish[0]}' удалено из меню!")
         
     except ValueError:
@@ -488,36 +214,8 @@ def createOrder():
         show_table_status()
         
         table_number = int(input("\nВведите номер стола для заказа: "))
-        if table_number < 1 or table_number > 20:
-            print("Ошибка: номер стола должен быть от 1 до 20!")
-            input("Нажмите Enter для выхода...")
-            return None
-            
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("SELECT status FROM table_status WHERE table_number = ?", (table_number,))
-        table_status_result = c.fetchone()
-        
-        if not table_status_result:
-            print(f"Ошибка: стол #{table_number} не существует!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return None
-            
-        if table_status_result[0] != 'free':
-            print(f"Ошибка: стол #{table_number} уже занят или забронирован!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return None
-        
-        c.execute("INSERT INTO orders (table_number) VALUES (?)", (table_number,))
-        order_id = c.lastrowid
         
-        c.execute("UPDATE table_status SET status = 'occupied', last_updated = CURRENT_TIMESTAMP WHERE table_number = ?", (table_number,))
-        
-        db.commit()
-        db.close()
+        order_id = open_order(table_number)
         print(f"Заказ #{order_id} для стола {table_number} создан!")
         print("Статус стола автоматически изменен на 'Занят'")
         
@@ -529,6 +227,10 @@ def createOrder():
         print("Ошибка: номер стола должен быть числом!")
         input("Нажмите Enter для выхода...")
         return None
+    except OrderError as e:
+        print(f"Ошибка: {e}!")
+        input("Нажмите Enter для выхода...")
+        return None
     except Exception as e:
         print(f"Ошибка при создании заказа: {e}")
         input("Нажмите Enter для выхода...")
@@ -537,72 +239,42 @@ def createOrder():
 def add_dishes_to_new_order(order_id):
     """Добавить блюда в новый заказ"""
     try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
         while True:
-            os.system('cls' if os.name == 'nt' else 'clear')
-            print(f"=== ДОБАВЛЕНИЕ БЛЮД В ЗАКАЗ #{order_id} ===")
-            
-            c.execute("""
-                SELECT m.title, oi.quantity, m.price, oi.quantity * m.price as total
-                FROM order_items oi
-                JOIN menu m ON oi.menu_id = m.id
-                WHERE oi.order_id = ?
-            """, (order_id,))
+            clear_screen()
+            lines = [f"=== ДОБАВЛЕНИЕ БЛЮД В ЗАКАЗ #{order_id} ==="]
             
-            items = c.fetchall()
+            items = run('order.lines', (order_id,), model=OrderLine).fetchall()
             if items:
-                print("\nТекущие позиции в заказе:")
-                total_sum = 0
+                lines.append("\nТекущие позиции в заказе:")
                 for item in items:
-                    print(f"  - {item[0]} x{item[1]} = {item[3]} руб.")
-                    total_sum += item[3]
-                print(f"Общая сумма: {total_sum} руб.")
+                    lines.append(f"  - {item.title} x{item.quantity} = {item.total} руб.")
+                lines.append(f"Общая сумма: {sum(item.total for item in items)} руб.")
             else:
-                print("\nВ заказе пока нет позиций")
+                lines.append("\nВ заказе пока нет позиций")
             
-            print("\n1. Добавить блюдо")
-            print("2. Закончить и выйти")
+            lines.append("\n1. Добавить блюдо")
+            lines.append("2. Закончить и выйти")
+            write_lines(lines)
             
             choice = input("\nВыберите действие: ")
             
             if choice == '1':
-                c.execute("SELECT id, title, price FROM menu ORDER BY id")
-                items = c.fetchall()
-                print("\n=== МЕНЮ ===")
-                print("ID | Название            | Цена")
-                print("-" * 40)
-                for row in items:
-                    print(f"{row[0]:<2} | {row[1]:<20} | {row[2]} руб.")
+                show_menu_items("=== МЕНЮ ===")
                 
                 try:
                     dish_id = int(input("\nВведите ID блюда: "))
                     quantity = int(input("Введите количество: "))
                     
-                    if quantity <= 0:
-                        print("Количество должно быть положительным числом!")
-                        input("Нажмите Enter для продолжения...")
-                        continue
-                    
-                    c.execute("SELECT title FROM menu WHERE id = ?", (dish_id,))
-                    dish = c.fetchone()
-                    
-                    if not dish:
-                        print("Ошибка: блюдо не найдено!")
-                        input("Нажмите Enter для продолжения...")
-                        continue
-                    
-                    c.execute("INSERT INTO order_items (order_id, menu_id, quantity) VALUES (?, ?, ?)", 
-                             (order_id, dish_id, quantity))
-                    
-                    db.commit()
-                    print(f"Блюдо '{dish[0]}' добавлено в заказ!")
+                    title = add_order_item(order_id, dish_id, quantity)
+                    print(f"Блюдо '{title}' добавлено в заказ!")
                     input("Нажмите Enter для продолжения...")
                     
                 except ValueError:
                     print("Ошибка: ID и количество должны быть числами!")
                     input("Нажмите Enter для продолжения...")
+                except OrderError as e:
+                    print(f"Ошибка: {e}!")
+                    input("Нажмите Enter для продолжения...")
                     
             elif choice == '2':
                 break
@@ -610,8 +282,6 @@ def add_dishes_to_new_order(order_id):
                 print("Неверный выбор!")
                 input("Нажмите Enter для продолжения...")
         
-        db.close()
-        
     except Exception as e:
         print(f"Ошибка при добавлении блюд: {e}")
         input("Нажмите Enter для выхода...")
@@ -625,45 +295,13 @@ def addDishToOrder():
         dish_id = int(input("Введите ID блюда: "))
         quantity = int(input("Введите количество: "))
         
-        if quantity <= 0:
-            print("Количество должно быть положительным числом!")
-            input("Нажмите Enter для выхода...")
-            return
-            
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("SELECT id, status FROM orders WHERE id = ?", (order_id,))
-        order = c.fetchone()
-        if not order:
-            print("Ошибка: заказ не найден!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return
-            
-        if order[1] != 'active':
-            print("Ошибка: нельзя добавить блюдо в завершенный заказ!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return
-            
-        c.execute("SELECT title FROM menu WHERE id = ?", (dish_id,))
-        dish = c.fetchone()
-        if not dish:
-            print("Ошибка: блюдо не найдено!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return
-        
-        c.execute("INSERT INTO order_items (order_id, menu_id, quantity) VALUES (?, ?, ?)", 
-                 (order_id, dish_id, quantity))
-        
-        db.commit()
-        db.close()
-        print(f"Блюдо '{dish[0]}' успешно добавлено в заказ!")
+        title = add_order_item(order_id, dish_id, quantity)
+        print(f"Блюдо '{title}' успешно добавлено в заказ!")
         
     except ValueError:
         print("Ошибка: все значения должны быть числами!")
+    except OrderError as e:
+        print(f"Ошибка: {e}!")
     except Exception as e:
         print(f"Ошибка при добавлении блюда в заказ: {e}")
     input("Нажмите Enter для выхода...")
@@ -674,25 +312,15 @@ def removeDishFromOrder():
         order_id = int(input("Введите ID заказа: "))
         dish_id = int(input("Введите ID блюда для удаления: "))
         
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("""SELECT m.title FROM order_items oi 
-                     JOIN menu m ON oi.menu_id = m.id 
-                     WHERE oi.order_id = ? AND oi.menu_id = ?""", 
-                 (order_id, dish_id))
-        dish = c.fetchone()
+        dish = run('order_item.title', (order_id, dish_id)).fetchone()
         
         if not dish:
             print("Ошибка: блюдо не найдено в заказе!")
-            db.close()
             input("Нажмите Enter для выхода...")
             return
         
-        c.execute("DELETE FROM order_items WHERE order_id = ? AND menu_id = ?", 
-                 (order_id, dish_id))
-        db.commit()
-        db.close()
+        with get_connection():
+            run('order_item.delete', (order_id, dish_id))
         print(f"Блюдо '{dish[0]}' удалено из заказа!")
         
     except ValueError:
@@ -701,50 +329,33 @@ def removeDishFromOrder():
         print(f"Ошибка при удалении блюда из заказа: {e}")
     input("Нажмите Enter для выхода...")
 
+def render_order(order, connection=None):
+    """Строки заказа с позициями и суммой для экрана активных заказов
+
+    connection - база, где лежат позиции заказа (архив для найденных в
+    архиве заказов); без него - текущая точка.
+    """
+    lines = ["", f"Заказ #{order.id} | Стол: {order.table_number} | Время: {order.order_time} | Статус: {order.status}"]
+    
+    items = run('order.lines', (order.id,), model=OrderLine, connection=connection).fetchall()
+    if items:
+        for item in items:
+            lines.append(f"  - {item.title} x{item.quantity} = {item.total} руб.")
+    else:
+        lines.append("  (нет позиций)")
+    
+    lines.append(f"  ИТОГО: {sum(item.total for item in items)} руб.")
+    return lines
+
 def showActiveOrders():
     """Показать активные заказы"""
     try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("""
-            SELECT o.id, o.table_number, o.order_time, o.status
-            FROM orders o 
-            WHERE o.status = 'active'
-            ORDER BY o.order_time DESC
-        """)
-        
-        orders = c.fetchall()
-        
-        if not orders:
-            print("Активных заказов нет.")
-            db.close()
-            return
-        
-        print("\n=== АКТИВНЫЕ ЗАКАЗЫ ===")
-        for order in orders:
-            print(f"\nЗаказ #{order[0]} | Стол: {order[1]} | Время: {order[2]} | Статус: {order[3]}")
-            
-            c.execute("""
-                SELECT m.title, m.price, oi.quantity
-                FROM order_items oi
-                JOIN menu m ON oi.menu_id = m.id
-                WHERE oi.order_id = ?
-            """, (order[0],))
-            
-            items = c.fetchall()
-            total = 0
-            if items:
-                for item in items:
-                    item_total = item[1] * item[2]
-                    total += item_total
-                    print(f"  - {item[0]} x{item[2]} = {item_total} руб.")
-            else:
-                print("  (нет позиций)")
-            
-            print(f"  ИТОГО: {total} руб.")
-        
-        db.close()
+        page_rows(lambda after: run('order.active', after, model=Order),
+                  key=lambda order: (order.order_time, order.id),
+                  render_row=render_order,
+                  header=["", "=== АКТИВНЫЕ ЗАКАЗЫ ==="],
+                  empty="Активных заказов нет.",
+                  start=ORDER_KEY_START)
     except Exception as e:
         print(f"Ошибка при получении активных заказов: {e}")
 
@@ -754,19 +365,6 @@ def changeOrderStatus():
         showActiveOrders()
         order_id = int(input("\nВведите ID заказа для изменения статуса: "))
         
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        c.execute("SELECT table_number FROM orders WHERE id = ?", (order_id,))
-        order = c.fetchone()
-        if not order:
-            print("Заказ не найден!")
-            db.close()
-            input("Нажмите Enter для выхода...")
-            return
-            
-        table_number = order[0]
-        
         print("\nДоступные статусы:")
         print("1. active - активный")
         print("2. completed - завершен")
@@ -777,82 +375,73 @@ def changeOrderStatus():
         
         if status_choice not in status_map:
             print("Неверный выбор статуса!")
-            db.close()
             input("Нажмите Enter для выхода...")
             return
             
         new_status = status_map[status_choice]
-        c.execute("UPDATE orders SET status = ? WHERE id = ?", 
-                 (new_status, order_id))
+        table_number = set_order_status(order_id, new_status)
         
         if new_status in ['completed', 'cancelled']:
-            update_table_status(table_number, 'free')
             print(f"Стол #{table_number} освобожден")
         
-        db.commit()
-        db.close()
         print(f"Статус заказа #{order_id} изменен на '{new_status}'")
     except ValueError:
         print("Ошибка: ID должен быть числом!")
+    except OrderError as e:
+        print(f"Ошибка: {e}!")
     except Exception as e:
         print(f"Ошибка при изменении статуса заказа: {e}")
     input("Нажмите Enter для выхода...")
 
 def generateReports():
-    """Генерация отчетов для владельца"""
-    try:
-        db = sqlite3.connect(DB)
-        c = db.cursor()
-        
-        print("\n=== ОТЧЕТЫ ===")
-        
-        c.execute("""
-            SELECT SUM(m.price * oi.quantity) 
-            FROM order_items oi 
-            JOIN menu m ON oi.menu_id = m.id 
-            JOIN orders o ON oi.order_id = o.id 
-            WHERE o.status = 'completed'
-        """)
-        total_revenue = c.fetchone()[0] or 0
-        print(f"Общая выручка: {total_revenue} руб.")
-        
-        c.execute("SELECT COUNT(*) FROM orders WHERE status = 'completed'")
-        completed_orders = c.fetchone()[0]
-        print(f"Завершенных заказов: {completed_orders}")
-        
-        c.execute("SELECT COUNT(*) FROM orders WHERE status = 'active'")
-        active_orders = c.fetchone()[0]
-        print(f"Активных заказов: {active_orders}")
-        
-        c.execute("SELECT status, COUNT(*) FROM table_status GROUP BY status")
-        table_statuses = c.fetchall()
-        print("\nСтатусы столов:")
-        for status, count in table_statuses:
-            status_ru = {'free': 'Свободны', 'occupied': 'Заняты', 'reserved': 'Бронь'}.get(status, status)
-            print(f"- {status_ru}: {count} столов")
-        
-        print("\nСамые популярные блюда:")
-        c.execute("""
-            SELECT m.title, SUM(oi.quantity) as total_quantity
-            FROM order_items oi 
-            JOIN menu m ON oi.menu_id = m.id 
-            GROUP BY m.id 
-            ORDER BY total_quantity DESC 
-            LIMIT 5
-        """)
-        popular_dishes = c.fetchall()
-        for i, dish in enumerate(popular_dishes, 1):
-            print(f"{i}. {dish[0]} - {dish[1]} порций")
-        
-        db.close()
-    except Exception as e:
-        print(f"Ошибка при генерации отчетов: {e}")
-    input("\nНажмите Enter для выхода...")
+    """Отчеты владельца (модуль отчетов загружается при первом вызове)"""
+    from reports import generateReports as run_reports
+    run_reports()
+
+def generateChainReport():
+    """Сводный отчет сети (модуль отчетов загружается при первом вызове)"""
+    from reports import generateChainReport as run_chain_report
+    run_chain_report()
+
+def export_data_menu():
+    """Меню экспорта данных (модуль экспорта загружается при первом вызове)"""
+    from exporter import export_data_menu as run_export_menu
+    run_export_menu()
+
+def reservationsMenu():
+    """Меню бронирования (модуль броней загружается при первом вызове)"""
+    from reservations import reservationsMenu as run_reservations_menu
+    run_reservations_menu()
+
+def archiveOrders():
+    """Архивация заказов (модуль архива загружается при первом вызове)"""
+    from archive import archiveOrders as run_archive_orders
+    run_archive_orders()
+
+def searchOrdersMenu():
+    """Поиск заказов (модуль поиска загружается при первом вызове)"""
+    from search import searchOrdersMenu as run_search_menu
+    run_search_menu()
+
+def diagnosticsMenu():
+    """Диагностика запросов (модуль загружается при первом вызове)"""
+    from diagnostics import diagnosticsMenu as run_diagnostics_menu
+    run_diagnostics_menu()
+
+def stationQueueMenu(station):
+    """Очередь тикетов станции (модуль кухни загружается при первом вызове)"""
+    from kitchen import stationQueueMenu as run_station_queue_menu
+    run_station_queue_menu(station)
+
+def showStationMetrics():
+    """Метрики станций (модуль кухни загружается при первом вызове)"""
+    from kitchen import showStationMetrics as run_station_metrics
+    run_station_metrics()
 
 # Меню для разных ролей
 def waiterMenu():
     while True:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print("=== МЕНЮ ОФИЦИАНТА ===")
         print("1. Показать меню")
         print("2. Создать новый заказ")
@@ -891,13 +480,16 @@ def waiterMenu():
 
 def kitchenBarMenu():
     while True:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print("=== МЕНЮ КУХНИ/БАРА ===")
         print("1. Показать меню")
         print("2. Показать активные заказы")
         print("3. Изменить статус заказа")
         print("4. Показать статусы столов")
-        print("5. Выход")
+        print("5. Очередь кухни")
+        print("6. Очередь бара")
+        print("7. Метрики станций")
+        print("8. Выход")
         
         choice = input("Выберите действие: ")
         
@@ -911,6 +503,12 @@ def kitchenBarMenu():
         elif choice == '4':
             show_table_status()
         elif choice == '5':
+            stationQueueMenu('kitchen')
+        elif choice == '6':
+            stationQueueMenu('bar')
+        elif choice == '7':
+            showStationMetrics()
+        elif choice == '8':
             break
         else:
             print("Неверный выбор!")
@@ -918,7 +516,7 @@ def kitchenBarMenu():
 
 def adminMenu():
     while True:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print("=== МЕНЮ АДМИНИСТРАТОРА ===")
         print("1. Показать меню")
         print("2. Добавить блюдо в меню")
@@ -931,7 +529,11 @@ def adminMenu():
         print("9. Показать статусы столов")
         print("10. Изменить статус стола")
         print("11. Экспорт данных таблицы")
-        print("12. Выход")
+        print("12. Бронирование столов")
+        print("13. Архивировать старые заказы")
+        print("14. Диагностика запросов")
+        print("15. Поиск заказов")
+        print("16. Выход")
         
         choice = input("Выберите действие: ")
         
@@ -959,6 +561,14 @@ def adminMenu():
         elif choice == '11':
             export_data_menu()
         elif choice == '12':
+            reservationsMenu()
+        elif choice == '13':
+            archiveOrders()
+        elif choice == '14':
+            diagnosticsMenu()
+        elif choice == '15':
+            searchOrdersMenu()
+        elif choice == '16':
             break
         else:
             print("Неверный выбор!")
@@ -966,7 +576,7 @@ def adminMenu():
 
 def ownerMenu():
     while True:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print("=== МЕНЮ ВЛАДЕЛЬЦА ===")
         print("1. Показать меню")
         print("2. Добавить блюдо в меню")
@@ -977,7 +587,8 @@ def ownerMenu():
         print("7. Изменить статус стола")
         print("8. Просмотреть отчеты")
         print("9. Экспорт данных таблицы")
-        print("10. Выход")
+        print("10. Сводный отчет по сети")
+        print("11. Выход")
         
         choice = input("Выберите действие: ")
         
@@ -1001,6 +612,8 @@ def ownerMenu():
         elif choice == '9':
             export_data_menu()
         elif choice == '10':
+            generateChainReport()
+        elif choice == '11':
             break
         else:
             print("Неверный выбор!")
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+
+from models import Ticket, OrderLine
+from screen import clear_screen
+from statements import get_connection, run
+
+STATIONS = {'kitchen': 'Кухня', 'bar': 'Бар'}
+TICKET_STATUSES = {'new': 'Новый', 'in_progress': 'Готовится', 'done': 'Готов'}
+
+# Через сколько минут после заказа гость ждет подачу: напитки и закуски
+# сразу, основное и десерт позже. Вместе с временем приготовления это
+# дает момент, когда тикет нужно начать, - по нему строится очередь.
+COURSE_DELAY_MINUTES = {1: 0, 2: 10, 3: 25}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# ==================== МАРШРУТИЗАЦИЯ ТИКЕТОВ ====================
+
+def route_pending_items(connection):
+    """Разложить новые позиции активных заказов по тикетам станций
+
+    Позиции без тикета группируются по (заказ, станция) и добавляются в
+    ещё не начатый тикет этого заказа на станции или в новый тикет.
+    Вызывается при открытии очереди, поэтому официанту ничего не нужно
+    делать дополнительно. Возвращает количество разложенных позиций.
+    
+    При ошибке транзакция откатывается: соединение потока живет всю
+    работу программы и не должно остаться с блокировкой на запись.
+    """
+    cursor = connection.cursor()
+    # Несколько экранов станций раскладывают позиции одновременно:
+    # блокировка на запись с самого начала не дает разложить позицию дважды
+    if not connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    try:
+        groups = {}
+        for rowid, order_id, station in run('kitchen.pending_items', connection=connection):
+            groups.setdefault((order_id, station), []).append(rowid)
+        
+        for (order_id, station), rowids in groups.items():
+            ticket = run('kitchen.open_ticket', (order_id, station), connection=connection).fetchone()
+            if ticket:
+                ticket_id = ticket[0]
+            else:
+                ticket_id = run('kitchen.ticket_insert', (order_id, station), connection=connection).lastrowid
+            cursor.execute(f"UPDATE order_items SET ticket_id = ? WHERE rowid IN ({', '.join('?' * len(rowids))})",
+                           [ticket_id] + rowids)
+        
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return sum(len(rowids) for rowids in groups.values())
+
+# ==================== ПЛАНИРОВЩИК ОЧЕРЕДИ ====================
+
+def ticket_start_by(ticket):
+    """Момент, когда тикет нужно начать готовить, чтобы подать вовремя
+
+    Срок подачи - время заказа плюс задержка подачи (курс), из него
+    вычитается время самого долгого блюда тикета. Чем раньше момент, тем
+    выше приоритет: старые тикеты и долгие блюда поднимаются в очереди,
+    десерты ждут основное. Время создания тикета не учитывается: оно
+    зависит от того, когда экран станции разложил позиции.
+    """
+    ordered = datetime.strptime(ticket.order_time, TIMESTAMP_FORMAT)
+    delay = COURSE_DELAY_MINUTES.get(ticket.course, 0)
+    return ordered + timedelta(minutes=delay - ticket.prep_minutes)
+
+def get_station_queue(connection, station):
+    """Незавершенные тикеты станции в порядке приоритета"""
+    tickets = run('kitchen.station_queue', (station,), model=Ticket, connection=connection).fetchall()
+    # Начатые тикеты всегда выше: их уже готовят
+    tickets.sort(key=lambda ticket: (ticket.status != 'in_progress', ticket_start_by(ticket), ticket.id))
+    return tickets
+
+def get_ticket_lines(connection, ticket_ids):
+    """Позиции тикетов: {номер тикета: [OrderLine]}"""
+    if not ticket_ids:
+        return {}
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT oi.ticket_id, m.title, m.price, oi.quantity
+        FROM order_items oi
+        JOIN menu m ON oi.menu_id = m.id
+        WHERE oi.ticket_id IN ({', '.join('?' * len(ticket_ids))})
+    """, list(ticket_ids))
+    lines = {}
+    for ticket_id, title, price, quantity in cursor.fetchall():
+        lines.setdefault(ticket_id, []).append(OrderLine(title, price, quantity))
+    return lines
+
+def set_ticket_status(connection, ticket_id, status):
+    """Начать тикет или отметить готовым, вернуть True если тикет найден"""
+    name = 'kitchen.ticket_start' if status == 'in_progress' else 'kitchen.ticket_done'
+    cursor = run(name, (ticket_id,), connection=connection)
+    connection.commit()
+    return cursor.rowcount > 0
+
+def get_station_metrics(connection, station):
+    """Пропускная способность и ожидание станции
+
+    Возвращает словарь: готово за час и за сутки, среднее ожидание до
+    начала и среднее время приготовления за сутки (минуты), длина
+    очереди и ожидание самого старого тикета в ней.
+    """
+    done_last_hour, done_last_day, avg_wait, avg_prep = run(
+        'kitchen.metrics_done', (station,), connection=connection).fetchone()
+    queue_length, oldest_wait = run('kitchen.metrics_queue', (station,), connection=connection).fetchone()
+    
+    return {
+        'done_last_hour': done_last_hour or 0,
+        'done_last_day': done_last_day,
+        'avg_wait_minutes': avg_wait or 0,
+        'avg_prep_minutes': avg_prep or 0,
+        'queue_length': queue_length,
+        'oldest_wait_minutes': oldest_wait or 0,
+    }
+
+# ==================== ЭКРАНЫ СТАНЦИЙ ====================
+
+def show_station_queue(connection, station):
+    """Вывести очередь станции"""
+    route_pending_items(connection)
+    tickets = get_station_queue(connection, station)
+    lines = get_ticket_lines(connection, [ticket.id for ticket in tickets])
+    
+    print(f"=== ОЧЕРЕДЬ: {STATIONS[station].upper()} ({len(tickets)}) ===")
+    if not tickets:
+        print("Очередь пуста.")
+    # Время в базе - UTC без часового пояса (CURRENT_TIMESTAMP)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for ticket in tickets:
+        created = datetime.strptime(ticket.created_at, TIMESTAMP_FORMAT)
+        age = int((now - created).total_seconds() // 60)
+        print(f"\nТикет #{ticket.id} | Заказ #{ticket.order_id} | Стол: {ticket.table_number} | "
+              f"{TICKET_STATUSES.get(ticket.status, ticket.status)} | ждет {age} мин")
+        for line in lines.get(ticket.id, []):
+            print(f"  - {line.title} x{line.quantity}")
+
+def stationQueueMenu(station):
+    """Очередь тикетов станции с действиями повара/бармена"""
+    connection = get_connection()
+    try:
+        while True:
+            clear_screen()
+            show_station_queue(connection, station)
+            
+            print("\n1. Начать тикет")
+            print("2. Тикет готов")
+            print("3. Обновить")
+            print("4. Выход")
+            choice = input("Выберите действие: ")
+            
+            if choice in ('1', '2'):
+                try:
+                    ticket_id = int(input("Введите номер тикета: "))
+                    status = 'in_progress' if choice == '1' else 'done'
+                    if not set_ticket_status(connection, ticket_id, status):
+                        print("Тикет не найден или уже в этом статусе!")
+                        input("Нажмите Enter для продолжения...")
+                except ValueError:
+                    print("Ошибка: номер тикета должен быть числом!")
+                    input("Нажмите Enter для продолжения...")
+            elif choice == '3':
+                continue
+            elif choice == '4':
+                break
+            else:
+                print("Неверный выбор!")
+                input("Нажмите Enter для продолжения...")
+    except Exception as e:
+        if connection.in_transaction:
+            connection.rollback()
+        print(f"Ошибка очереди станции: {e}")
+        input("Нажмите Enter для выхода...")
+
+def showStationMetrics():
+    """Показать метрики кухни и бара"""
+    try:
+        connection = get_connection()
+        route_pending_items(connection)
+        print("\n=== МЕТРИКИ СТАНЦИЙ ===")
+        for station, name in STATIONS.items():
+            metrics = get_station_metrics(connection, station)
+            print(f"\n{name}:")
+            print(f"  Готово за час: {metrics['done_last_hour']}, за сутки: {metrics['done_last_day']}")
+            print(f"  Среднее ожидание до начала: {metrics['avg_wait_minutes']:.1f} мин")
+            print(f"  Среднее время приготовления: {metrics['avg_prep_minutes']:.1f} мин")
+            print(f"  В очереди: {metrics['queue_length']}, "
+                  f"самый старый ждет {metrics['oldest_wait_minutes']:.0f} мин")
+    except Exception as e:
+        print(f"Ошибка при получении метрик: {e}")
+    input("\nНажмите Enter для выхода...")
@@ -1,35 +1,67 @@
 import os
-from functions import *
+import db
+from screen import clear_screen
 
-# Инициализация базы данных при запуске
-init_db()
+# Меню ролей загружаются из functions только при первом выборе роли
+ROLE_MENUS = {
+    1: 'waiterMenu',
+    2: 'kitchenBarMenu',
+    3: 'adminMenu',
+    4: 'ownerMenu',
+}
 
-while True:
-    os.system('clear')
-    print("Авторизация")
-    print("Выберете вашу роль:")
-    print("1. Официант")
-    print("2. Кухня/бар")
-    print("3. Администратор")
-    print("4. Владелец")
-    print("5. Выход")
+def open_role_menu(menu_name):
+    """Открыть меню роли, импортировав модуль при первом обращении"""
+    import functions
+    getattr(functions, menu_name)()
+
+def choose_location():
+    """Выбрать точку сети, если их несколько и точка не задана в окружении"""
+    if len(db.LOCATIONS) < 2 or os.environ.get('CAFE_LOCATION') or os.environ.get('CAFE_DB'):
+        return
+    names = list(db.LOCATIONS)
+    while True:
+        print("Выберите кафе:")
+        for i, name in enumerate(names, 1):
+            print(f"{i}. {name}")
+        try:
+            choice = int(input("Ваш выбор _: "))
+            if 1 <= choice <= len(names):
+                db.set_location(names[choice - 1])
+                return
+        except ValueError:
+            pass
+        print("Неверный выбор!")
+
+def main():
+    choose_location()
     
-    try:
-        enter = int(input("Ваш выбор _: "))
-        if enter == 1:
-            waiterMenu() 
-        elif enter == 2:
-            kitchenBarMenu() 
-        elif enter == 3:
-            adminMenu() 
-        elif enter == 4:
-            ownerMenu()
-        elif enter == 5:
-            print("Выход из программы....")
-            break
-        else:
-            print("Неверный выбор! Нажмите Enter для продолжения...")
-            input()
-    except ValueError:
-        print("Ошибка: введите число от 1 до 5!")
-        input("Нажмите Enter для продолжения....")
\ No newline at end of file
+    # Инициализация базы данных при запуске
+    db.init_db()
+
+    while True:
+        clear_screen()
+        print("Авторизация")
+        print("Выберете вашу роль:")
+        print("1. Официант")
+        print("2. Кухня/бар")
+        print("3. Администратор")
+        print("4. Владелец")
+        print("5. Выход")
+        
+        try:
+            enter = int(input("Ваш выбор _: "))
+            if enter in ROLE_MENUS:
+                open_role_menu(ROLE_MENUS[enter])
+            elif enter == 5:
+                print("Выход из программы....")
+                break
+            else:
+                print("Неверный выбор! Нажмите Enter для продолжения...")
+                input()
+        except ValueError:
+            print("Ошибка: введите число от 1 до 5!")
+            input("Нажмите Enter для продолжения....")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+from typing import NamedTuple
+
+# ==================== МОДЕЛЬ ДАННЫХ ====================
+# Записи - именованные кортежи: без __dict__ на каждый объект, доступ по
+# имени поля вместо row[0]. Из строк курсора они создаются через
+# row_factory, без разбора колонок в Python.
+
+class MenuItem(NamedTuple):
+    """Блюдо меню"""
+    id: int
+    title: str
+    price: int
+
+class Order(NamedTuple):
+    """Заказ"""
+    id: int
+    table_number: int
+    order_time: str
+    status: str
+
+class Ticket(NamedTuple):
+    """Тикет станции: позиции одного заказа для кухни или бара"""
+    id: int
+    order_id: int
+    table_number: int
+    station: str
+    status: str
+    created_at: str
+    order_time: str
+    course: int
+    prep_minutes: int
+
+class OrderLine(NamedTuple):
+    """Позиция заказа с названием и ценой блюда для вывода на экран"""
+    title: str
+    price: int
+    quantity: int
+
+    @property
+    def total(self):
+        return self.price * self.quantity
+
+class TableStatus(NamedTuple):
+    """Статус стола"""
+    table_number: int
+    status: str
+    last_updated: str
+    seats: int
+
+class Reservation(NamedTuple):
+    """Бронь стола на интервал времени [start_time, end_time)"""
+    id: int
+    table_number: int
+    start_time: str
+    end_time: str
+    guests: int
+    guest_name: str
+    phone: str
+
+def select_columns(model, alias=None):
+    """Список колонок для SELECT в порядке полей модели"""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + field for field in model._fields)
+
+def row_factory(model):
+    """Фабрика строк sqlite3, создающая объекты модели"""
+    make = model._make
+    return lambda cursor, row: make(row)
+
+def dict_factory(columns):
+    """Фабрика строк sqlite3, создающая словари с заданными колонками"""
+    return lambda cursor, row: dict(zip(columns, row))
@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import db
+
+STATUS_NAMES = {'free': 'Свободны', 'occupied': 'Заняты', 'reserved': 'Бронь'}
+TOP_DISHES = 5
+
+# ==================== АГРЕГАТЫ ОТЧЕТОВ ====================
+# Отчет собирается из частичных агрегатов: суммы и счетчики, которые
+# можно сложить между базами. Так один и тот же код считает отчет одного
+# кафе и сводный отчет сети.
+
+def collect_report(cursor, schema='main'):
+    """Посчитать частичные агрегаты отчета по одной базе
+
+    schema - имя подключенной базы; у архивов (не main) нет статусов
+    столов, они относятся только к текущему состоянию зала.
+    """
+    cursor.execute(f"""
+        SELECT SUM(m.price * oi.quantity) 
+        FROM {schema}.order_items oi 
+        JOIN {schema}.menu m ON oi.menu_id = m.id 
+        JOIN {schema}.orders o ON oi.order_id = o.id 
+        WHERE o.status = 'completed'
+    """)
+    revenue = cursor.fetchone()[0] or 0
+    
+    cursor.execute(f"""
+        SELECT status, COUNT(*) FROM {schema}.orders
+        WHERE status IN ('completed', 'active') GROUP BY status
+    """)
+    order_counts = dict(cursor.fetchall())
+    
+    table_statuses = {}
+    if schema == 'main':
+        cursor.execute("SELECT status, COUNT(*) FROM table_status GROUP BY status")
+        table_statuses = dict(cursor.fetchall())
+    
+    # Блюда сводятся по названию: id одного блюда в разных кафе разные
+    cursor.execute(f"""
+        SELECT m.title, SUM(oi.quantity)
+        FROM {schema}.order_items oi 
+        JOIN {schema}.menu m ON oi.menu_id = m.id 
+        GROUP BY m.id
+    """)
+    dishes = {}
+    for title, quantity in cursor.fetchall():
+        dishes[title] = dishes.get(title, 0) + quantity
+    
+    return {
+        'revenue': revenue,
+        'completed_orders': order_counts.get('completed', 0),
+        'active_orders': order_counts.get('active', 0),
+        'table_statuses': table_statuses,
+        'dishes': dishes,
+    }
+
+def merge_reports(reports):
+    """Сложить частичные агрегаты нескольких баз"""
+    merged = {'revenue': 0, 'completed_orders': 0, 'active_orders': 0,
+              'table_statuses': {}, 'dishes': {}}
+    for report in reports:
+        for key in ('revenue', 'completed_orders', 'active_orders'):
+            merged[key] += report[key]
+        for key in ('table_statuses', 'dishes'):
+            for name, count in report[key].items():
+                merged[key][name] = merged[key].get(name, 0) + count
+    return merged
+
+def print_report(report):
+    """Вывести отчет в формате экрана владельца"""
+    print(f"Общая выручка: {report['revenue']} руб.")
+    print(f"Завершенных заказов: {report['completed_orders']}")
+    print(f"Активных заказов: {report['active_orders']}")
+    
+    print("\nСтатусы столов:")
+    for status, count in sorted(report['table_statuses'].items()):
+        print(f"- {STATUS_NAMES.get(status, status)}: {count} столов")
+    
+    print("\nСамые популярные блюда:")
+    popular_dishes = sorted(report['dishes'].items(), key=lambda dish: dish[1], reverse=True)
+    for i, (title, quantity) in enumerate(popular_dishes[:TOP_DISHES], 1):
+        print(f"{i}. {title} - {quantity} порций")
+
+# ==================== СВОДНЫЙ ОТЧЕТ СЕТИ ====================
+
+def collect_database_report(connection, include_archive=False, path=None):
+    """Отчет по базе, при include_archive - вместе с архивами базы path"""
+    report = collect_report(connection.cursor())
+    if not include_archive:
+        return report
+    from archive import collect_archive_reports
+    return merge_reports([report] + collect_archive_reports(connection, path))
+
+def collect_location_report(path, include_archive=False):
+    """Частичный отчет одной точки, выполняется в отдельном процессе
+
+    Текущая точка процесса не меняется: при workers=1 отчет считается в
+    процессе программы.
+    """
+    # as_uri кодирует ?, # и % в имени и переводит путь Windows в file:///C:/...
+    connection = db.connect(Path(path).absolute().as_uri() + '?mode=ro', uri=True)
+    try:
+        return collect_database_report(connection, include_archive, path)
+    finally:
+        connection.close()
+
+def federated_report(locations=None, workers=None, include_archive=False):
+    """Собрать отчеты всех точек параллельно и сложить их
+
+    Каждая база читается в своем процессе, данные точек никуда не
+    копируются. Возвращает (сводный отчет, {точка: отчет},
+    {точка: текст ошибки}) - недоступная точка не ломает весь отчет.
+    """
+    locations = locations or db.LOCATIONS
+    names = list(locations)
+    workers = workers or min(len(names), os.cpu_count() or 1)
+    
+    reports = {}
+    errors = {}
+    if workers <= 1:
+        for name in names:
+            try:
+                reports[name] = collect_location_report(locations[name], include_archive)
+            except Exception as e:
+                errors[name] = str(e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(collect_location_report, locations[name], include_archive)
+                       for name in names}
+            for name, future in futures.items():
+                try:
+                    reports[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+    
+    return merge_reports(reports.values()), reports, errors
+
+def generateReports():
+    """Генерация отчетов для владельца"""
+    try:
+        include_archive = input("Включить архивные заказы? (y/N): ").strip().lower() == 'y'
+        connection = db.connect()
+        report = collect_database_report(connection, include_archive)
+        connection.close()
+        
+        print("\n=== ОТЧЕТЫ ===")
+        print_report(report)
+    except Exception as e:
+        print(f"Ошибка при генерации отчетов: {e}")
+    input("\nНажмите Enter для выхода...")
+
+def generateChainReport():
+    """Сводный отчет по всем точкам сети"""
+    try:
+        include_archive = input("Включить архивные заказы? (y/N): ").strip().lower() == 'y'
+        total, reports, errors = federated_report(include_archive=include_archive)
+        
+        print(f"\n=== СВОДНЫЙ ОТЧЕТ СЕТИ ({len(reports)} из {len(db.LOCATIONS)} точек) ===")
+        for name, report in reports.items():
+            print(f"- {name}: выручка {report['revenue']} руб., "
+                  f"завершенных заказов {report['completed_orders']}")
+        for name, error in errors.items():
+            print(f"- {name}: ошибка - {error}")
+        
+        print()
+        print_report(total)
+    except Exception as e:
+        print(f"Ошибка при генерации сводного отчета: {e}")
+    input("\nНажмите Enter для выхода...")
@@ -0,0 +1,389 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import db
+from models import Reservation
+from screen import clear_screen
+from statements import CACHED_STATEMENTS, run
+
+TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+# ==================== ИНДЕКС БРОНЕЙ ====================
+
+class ReservationIndex:
+    """Индекс броней в памяти для поиска свободных столов
+
+    Для каждого стола брони хранятся отсортированными по началу; брони
+    одного стола не пересекаются, поэтому и концы идут по возрастанию, и
+    проверка свободного интервала - один bisect. Столы отсортированы по
+    количеству мест, так что столы с мест >= N находятся тоже через bisect.
+    Источник истины - таблица reservations, индекс её зеркалирует.
+    Закончившиеся брони в индексе не хранятся: они не пересекаются ни с
+    одним будущим интервалом, а копились бы всю работу программы.
+    """
+
+    def __init__(self):
+        self.tables = []      # отсортированные пары (мест, номер стола)
+        self.seats = {}       # номер стола -> мест
+        self.starts = {}      # номер стола -> начала броней по возрастанию
+        self.slots = {}       # номер стола -> брони в том же порядке
+        self.version = None   # reservations_version на момент загрузки
+        self.data_version = None
+
+    def load(self, connection):
+        """Перечитать столы и активные незакончившиеся брони из базы
+
+        Столы, брони и номер версии читаются в одной транзакции, то есть
+        из одного снимка базы: изменение, сделанное между запросами,
+        иначе попало бы в одни данные и не попало в другие.
+        """
+        connection.execute("BEGIN")
+        try:
+            tables = run('reservation.tables', connection=connection).fetchall()
+            reservations = run('reservation.active', (now(),), model=Reservation,
+                               connection=connection).fetchall()
+            version = read_version(connection)
+        finally:
+            connection.execute("COMMIT")
+        
+        self.tables = tables
+        self.seats = {number: seats for seats, number in tables}
+        self.starts = {number: [] for number in self.seats}
+        self.slots = {number: [] for number in self.seats}
+        for reservation in reservations:
+            self.starts.setdefault(reservation.table_number, []).append(reservation.start_time)
+            self.slots.setdefault(reservation.table_number, []).append(reservation)
+        self.version = version
+
+    def is_free(self, table_number, start, end):
+        """Свободен ли стол на интервале [start, end)"""
+        starts = self.starts.get(table_number, [])
+        # Последняя бронь, начавшаяся раньше end, - единственная, которая может пересекаться
+        i = bisect_left(starts, end)
+        return i == 0 or self.slots[table_number][i - 1].end_time <= start
+
+    def free_tables(self, start, end, guests):
+        """Свободные на [start, end) столы с мест >= guests, от меньших к большим"""
+        first = bisect_left(self.tables, (guests,))
+        return [(number, seats) for seats, number in self.tables[first:]
+                if self.is_free(number, start, end)]
+
+    def add(self, reservation):
+        """Добавить бронь в индекс"""
+        starts = self.starts.setdefault(reservation.table_number, [])
+        slots = self.slots.setdefault(reservation.table_number, [])
+        i = bisect_right(starts, reservation.start_time)
+        starts.insert(i, reservation.start_time)
+        slots.insert(i, reservation)
+
+    def remove(self, reservation):
+        """Убрать бронь из индекса"""
+        starts = self.starts.get(reservation.table_number, [])
+        slots = self.slots.get(reservation.table_number, [])
+        i = bisect_left(starts, reservation.start_time)
+        while i < len(slots) and starts[i] == reservation.start_time:
+            if slots[i].id == reservation.id:
+                del starts[i]
+                del slots[i]
+                return
+            i += 1
+
+    def prune(self, moment):
+        """Убрать брони, закончившиеся к moment
+
+        Концы броней стола идут по возрастанию, поэтому закончившиеся
+        брони - всегда начало списка.
+        """
+        for number, slots in self.slots.items():
+            i = 0
+            while i < len(slots) and slots[i].end_time <= moment:
+                i += 1
+            if i:
+                del slots[:i]
+                del self.starts[number][:i]
+
+# Долгоживущее соединение индекса и сам индекс, по одному на базу
+_connection = None
+_connection_db = None
+_index = None
+
+def now():
+    """Текущее время в формате хранения броней"""
+    return datetime.now().strftime(TIME_FORMAT)
+
+def read_version(connection):
+    """Номер версии броней, увеличивается триггерами при любых изменениях"""
+    return run('reservation.version', connection=connection).fetchone()[0]
+
+def get_connection():
+    """Соединение для броней; транзакции открываются явно"""
+    global _connection, _connection_db, _index
+    if _connection is None or _connection_db != db.DB:
+        if _connection is not None:
+            _connection.close()
+        _connection = db.connect(isolation_level=None, cached_statements=CACHED_STATEMENTS)
+        _connection_db = db.DB
+        _index = None
+    return _connection
+
+def get_reservation_index():
+    """Получить актуальный индекс броней
+
+    Перечитывает индекс, только если брони или места изменились из
+    другого соединения: сначала дешевый PRAGMA data_version, затем
+    счетчик reservations_version. Закончившиеся брони убираются.
+    """
+    global _index
+    connection = get_connection()
+    if _index is None:
+        # data_version читается до загрузки: изменение, сделанное другим
+        # соединением во время загрузки, будет замечено при следующем вызове
+        _index = ReservationIndex()
+        _index.data_version = run('reservation.data_version', connection=connection).fetchone()[0]
+        _index.load(connection)
+        _index.prune(now())
+        return _index
+    
+    data_version = run('reservation.data_version', connection=connection).fetchone()[0]
+    if data_version != _index.data_version:
+        _index.data_version = data_version
+        if read_version(connection) != _index.version:
+            _index.load(connection)
+    _index.prune(now())
+    return _index
+
+def apply_change(index, connection, version, change):
+    """Применить к индексу свое изменение броней
+
+    version - reservations_version, прочитанный в транзакции изменения.
+    Если он больше версии индекса ровно на единицу, других изменений не
+    было и достаточно change(); иначе между загрузкой индекса и
+    транзакцией базу изменило другое соединение, и индекс перечитывается.
+    """
+    if version == index.version + 1:
+        change()
+        index.version = version
+    else:
+        index.load(connection)
+
+# ==================== ОПЕРАЦИИ С БРОНЯМИ ====================
+
+def parse_time(text):
+    """Разобрать время 'ГГГГ-ММ-ДД ЧЧ:ММ' и привести к формату хранения"""
+    return datetime.strptime(text.strip(), TIME_FORMAT).strftime(TIME_FORMAT)
+
+def check_interval(start, end):
+    """Проверить и нормализовать интервал брони"""
+    start, end = parse_time(start), parse_time(end)
+    if end <= start:
+        raise ValueError("Время окончания должно быть позже времени начала")
+    return start, end
+
+def find_free_tables(start, end, guests):
+    """Столы с мест >= guests, свободные с start до end"""
+    start, end = check_interval(start, end)
+    return get_reservation_index().free_tables(start, end, guests)
+
+def book_table(table_number, start, end, guests, guest_name='', phone=''):
+    """Забронировать стол, вернуть номер брони
+
+    Проверка пересечения повторяется в базе внутри BEGIN IMMEDIATE,
+    поэтому две кассы не смогут занять один интервал одновременно.
+    """
+    start, end = check_interval(start, end)
+    if guests <= 0:
+        raise ValueError("Количество гостей должно быть положительным")
+    
+    index = get_reservation_index()
+    if table_number not in index.seats:
+        raise ValueError(f"Стол #{table_number} не существует")
+    if index.seats[table_number] < guests:
+        raise ValueError(f"За столом #{table_number} только {index.seats[table_number]} мест")
+    
+    connection = get_connection()
+    # Занятость по индексу подтверждается базой: отказ не должен зависеть
+    # от того, успел ли индекс увидеть отмену с другой кассы
+    if not index.is_free(table_number, start, end):
+        if run('reservation.overlap', (table_number, end, start), connection=connection).fetchone():
+            raise ValueError(f"Стол #{table_number} уже забронирован на это время")
+        index.load(connection)
+    
+    cursor = connection.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if run('reservation.overlap', (table_number, end, start), connection=connection).fetchone():
+            raise ValueError(f"Стол #{table_number} уже забронирован на это время")
+        
+        reservation_id = run('reservation.insert', (table_number, start, end, guests, guest_name, phone),
+                             connection=connection).lastrowid
+        version = read_version(connection)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    reservation = Reservation(reservation_id, table_number, start, end, guests, guest_name, phone)
+    apply_change(index, connection, version, lambda: index.add(reservation))
+    return reservation_id
+
+def cancel_reservation(reservation_id):
+    """Отменить бронь, вернуть True если она была активной"""
+    index = get_reservation_index()
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        reservation = run('reservation.get_active', (reservation_id,), model=Reservation,
+                          connection=connection).fetchone()
+        if reservation is None:
+            cursor.execute("ROLLBACK")
+            return False
+        
+        run('reservation.cancel', (reservation_id,), connection=connection)
+        version = read_version(connection)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    apply_change(index, connection, version, lambda: index.remove(reservation))
+    return True
+
+def set_table_seats(table_number, seats):
+    """Изменить количество мест за столом"""
+    if seats <= 0:
+        raise ValueError("Количество мест должно быть положительным")
+    connection = get_connection()
+    if run('table.set_seats', (seats, table_number), connection=connection).rowcount == 0:
+        raise ValueError(f"Стол #{table_number} не существует")
+    get_reservation_index().load(connection)
+
+def get_reservations_for_day(day):
+    """Активные брони, начинающиеся в указанный день 'ГГГГ-ММ-ДД'"""
+    start = datetime.strptime(day.strip(), '%Y-%m-%d')
+    end = start + timedelta(days=1)
+    return run('reservation.for_day', (start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)),
+               model=Reservation, connection=get_connection()).fetchall()
+
+# ==================== МЕНЮ БРОНИРОВАНИЯ ====================
+
+def bookTable():
+    """Забронировать стол"""
+    try:
+        start = input("Начало (ГГГГ-ММ-ДД ЧЧ:ММ): ")
+        end = input("Окончание (ГГГГ-ММ-ДД ЧЧ:ММ): ")
+        guests = int(input("Количество гостей: "))
+        
+        free = find_free_tables(start, end, guests)
+        if not free:
+            print("Нет свободных столов на это время!")
+            input("Нажмите Enter для выхода...")
+            return
+        
+        print("\nСвободные столы:")
+        for number, seats in free:
+            print(f"  - стол #{number} ({seats} мест)")
+        
+        table_number = int(input("\nВведите номер стола: "))
+        guest_name = input("Имя гостя: ").strip()
+        phone = input("Телефон: ").strip()
+        
+        reservation_id = book_table(table_number, start, end, guests, guest_name, phone)
+        print(f"Бронь #{reservation_id} на стол #{table_number} создана!")
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+    except Exception as e:
+        print(f"Ошибка при бронировании: {e}")
+    input("Нажмите Enter для выхода...")
+
+def showFreeTables():
+    """Показать свободные столы на интервал времени"""
+    try:
+        start = input("Начало (ГГГГ-ММ-ДД ЧЧ:ММ): ")
+        end = input("Окончание (ГГГГ-ММ-ДД ЧЧ:ММ): ")
+        guests = int(input("Количество гостей: "))
+        
+        free = find_free_tables(start, end, guests)
+        print(f"\n=== СВОБОДНЫЕ СТОЛЫ ({len(free)}) ===")
+        for number, seats in free:
+            print(f"Стол #{number:<3} | {seats} мест")
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+    except Exception as e:
+        print(f"Ошибка при поиске свободных столов: {e}")
+    input("Нажмите Enter для выхода...")
+
+def showReservations():
+    """Показать брони на день"""
+    try:
+        day = input("Дата (ГГГГ-ММ-ДД): ")
+        reservations = get_reservations_for_day(day)
+        
+        print(f"\n=== БРОНИ НА {day.strip()} ===")
+        if not reservations:
+            print("Броней нет.")
+        for reservation in reservations:
+            print(f"#{reservation.id:<4} | Стол {reservation.table_number:<3} | "
+                  f"{reservation.start_time[11:]}-{reservation.end_time[11:]} | "
+                  f"{reservation.guests} гостей | {reservation.guest_name} {reservation.phone}")
+    except ValueError:
+        print("Ошибка: дата должна быть в формате ГГГГ-ММ-ДД!")
+    except Exception as e:
+        print(f"Ошибка при получении броней: {e}")
+    input("Нажмите Enter для выхода...")
+
+def cancelReservation():
+    """Отменить бронь"""
+    try:
+        reservation_id = int(input("Введите номер брони: "))
+        if cancel_reservation(reservation_id):
+            print(f"Бронь #{reservation_id} отменена")
+        else:
+            print("Активная бронь с таким номером не найдена!")
+    except ValueError:
+        print("Ошибка: номер брони должен быть числом!")
+    except Exception as e:
+        print(f"Ошибка при отмене брони: {e}")
+    input("Нажмите Enter для выхода...")
+
+def changeTableSeats():
+    """Изменить количество мест за столом"""
+    try:
+        table_number = int(input("Введите номер стола: "))
+        seats = int(input("Количество мест: "))
+        set_table_seats(table_number, seats)
+        print(f"За столом #{table_number} теперь {seats} мест")
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+    except Exception as e:
+        print(f"Ошибка при изменении мест: {e}")
+    input("Нажмите Enter для выхода...")
+
+def reservationsMenu():
+    while True:
+        clear_screen()
+        print("=== БРОНИРОВАНИЕ СТОЛОВ ===")
+        print("1. Забронировать стол")
+        print("2. Свободные столы на время")
+        print("3. Брони на день")
+        print("4. Отменить бронь")
+        print("5. Изменить количество мест за столом")
+        print("6. Выход")
+        
+        choice = input("Выберите действие: ")
+        
+        if choice == '1':
+            bookTable()
+        elif choice == '2':
+            showFreeTables()
+        elif choice == '3':
+            showReservations()
+        elif choice == '4':
+            cancelReservation()
+        elif choice == '5':
+            changeTableSeats()
+        elif choice == '6':
+            break
+        else:
+            print("Неверный выбор!")
+            input("Нажмите Enter для продолжения...")
@@ -0,0 +1,99 @@
+import os
+import sys
+
+# Очистка экрана escape-последовательностью: курсор в начало и стирание.
+# os.system('clear') запускал оболочку и внешнюю программу на каждую перерисовку.
+CLEAR = '\033[H\033[2J'
+
+# Консоль Windows понимает escape-последовательности только после
+# включения режима ENABLE_VIRTUAL_TERMINAL_PROCESSING
+ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+STD_OUTPUT_HANDLE = -11
+_terminal_ready = os.name != 'nt'
+
+# Строк на страницу; 0 - по высоте терминала
+PAGE_ROWS = int(os.environ.get('CAFE_PAGE_ROWS', '0'))
+
+# ==================== ВЫВОД ====================
+
+def enable_escape_sequences():
+    """Включить escape-последовательности в консоли Windows
+
+    Режим консоли ставится через SetConsoleMode при первой очистке
+    экрана, а не при импорте: ни запуска оболочки, ни лишней работы при
+    старте программы.
+    """
+    global _terminal_ready
+    _terminal_ready = True
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        kernel32.SetConsoleMode(handle, mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+
+def clear_screen():
+    """Очистить экран терминала"""
+    if not _terminal_ready:
+        enable_escape_sequences()
+    sys.stdout.write(CLEAR)
+    sys.stdout.flush()
+
+def write_lines(lines):
+    """Вывести строки одной записью в терминал"""
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+
+def page_height():
+    """Сколько строк помещается на страницу"""
+    # shutil нужен только экранам со списками, не при запуске
+    import shutil
+    return PAGE_ROWS or max(5, shutil.get_terminal_size().lines - 4)
+
+# ==================== ПОСТРАНИЧНЫЙ ВЫВОД ====================
+
+def page_rows(fetch, key, render_row, header=(), empty=None, start=None):
+    """Вывести результат запроса постранично
+
+    fetch(after) - курсор со строками после ключа after в порядке вывода,
+    key(row) - ключ строки для следующей страницы, render_row(row) -
+    строки вывода для одной записи, start - ключ перед первой записью.
+
+    Строки читаются из курсора через fetchmany по одной странице, курсор
+    закрывается до вопроса "дальше?": незакрытый запрос держал бы чтение
+    базы и не давал другим терминалам записать изменения, пока на экране
+    ждут ввода. Заголовок повторяется на каждой странице, страница
+    выводится одной записью. Возвращает количество показанных записей.
+    """
+    height = page_height()
+    after = start
+    shown = 0
+    while True:
+        cursor = fetch(after)
+        rows = cursor.fetchmany(height + 1)
+        cursor.close()
+        if not rows:
+            break
+
+        more = len(rows) > height
+        buffer = list(header)
+        for row in rows[:height]:
+            lines = render_row(row)
+            # Запись целиком переносится на следующую страницу
+            if len(buffer) + len(lines) > height and len(buffer) > len(header):
+                more = True
+                break
+            buffer.extend(lines)
+            after = key(row)
+            shown += 1
+        write_lines(buffer)
+
+        if not more:
+            break
+        if input("-- Enter - следующая страница, q - закончить --").strip().lower() == 'q':
+            break
+
+    if not shown:
+        write_lines([empty] if empty is not None else list(header))
+    return shown
@@ -0,0 +1,240 @@
+import os
+from datetime import datetime, timedelta
+
+import db
+from archive import MAX_ATTACHED, get_archive_path, list_archives
+from models import Order, select_columns, row_factory
+from screen import page_rows
+from statements import ORDER_KEY_START, get_connection, run
+
+SEARCH_PAGE_SIZE = 20
+
+ORDER_STATUS_CHOICES = {'1': 'active', '2': 'completed', '3': 'cancelled'}
+
+# ==================== ПОИСК ====================
+
+def parse_search_time(text, end=False):
+    """Разобрать 'ГГГГ-ММ-ДД' или 'ГГГГ-ММ-ДД ЧЧ:ММ' в формат времени заказа
+
+    Для конца периода (end) дата без времени означает конец этого дня:
+    граница конца не включается, поэтому берется следующая полночь.
+    """
+    text = text.strip()
+    try:
+        moment = datetime.strptime(text, '%Y-%m-%d %H:%M')
+    except ValueError:
+        moment = datetime.strptime(text, '%Y-%m-%d')
+        if end:
+            moment += timedelta(days=1)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def find_menu_ids(connection, text):
+    """Блюда, в названии которых есть слова, начинающиеся с каждого слова text
+
+    Ищет по индексу menu_fts; если sqlite собран без FTS5, перебирает
+    меню (LIKE в sqlite не различает регистр только у латиницы).
+    """
+    words = text.split()
+    if run('search.has_fts', connection=connection).fetchone():
+        query = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+        return [row[0] for row in run('search.menu_fts', (query,), connection=connection)]
+    
+    words = [word.casefold() for word in words]
+    menu_ids = []
+    for dish_id, title in run('search.menu_titles', connection=connection):
+        title_words = title.casefold().split()
+        if all(any(title_word.startswith(word) for title_word in title_words) for word in words):
+            menu_ids.append(dish_id)
+    return menu_ids
+
+def build_order_search(menu_ids=None, table_number=None, since=None, until=None, status=None,
+                       schema='main'):
+    """Собрать запрос поиска заказов и его параметры
+
+    Последние два параметра запроса - ключ (время заказа, номер заказа)
+    последнего показанного заказа, их добавляет вызывающий код. Стол и
+    время выбираются по idx_orders_table_time или idx_orders_time, блюда -
+    по idx_order_items_menu_order. schema - подключенная база (архив).
+    """
+    conditions = []
+    params = []
+    if menu_ids is not None:
+        conditions.append(f"""o.id IN (
+            SELECT oi.order_id FROM {schema}.order_items oi
+            WHERE oi.menu_id IN ({', '.join('?' * len(menu_ids))}))""")
+        params.extend(menu_ids)
+    if table_number is not None:
+        conditions.append("o.table_number = ?")
+        params.append(table_number)
+    if since is not None:
+        conditions.append("o.order_time >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("o.order_time < ?")
+        params.append(until)
+    if status is not None:
+        conditions.append("o.status = ?")
+        params.append(status)
+    conditions.append("(o.order_time, o.id) < (?, ?)")
+    
+    query = f"""
+        SELECT {select_columns(Order, 'o')}
+        FROM {schema}.orders o
+        WHERE {' AND '.join(conditions)}
+        ORDER BY o.order_time DESC, o.id DESC
+    """
+    return query, params
+
+class ArchiveSearchCursor:
+    """Результат поиска по горячей базе и архивам с интерфейсом курсора
+
+    fetchmany(size) берет до size заказов после ключа из горячей базы и
+    из каждого архива и оставляет size самых новых. Архивы подключаются
+    к отдельному соединению группами по MAX_ATTACHED, как в отчетах.
+    Номера заказов при архивации сохраняются, поэтому ключ (время заказа,
+    номер) однозначен во всех базах.
+    """
+
+    def __init__(self, connection, archives, search, after):
+        self.connection = connection
+        self.archives = archives
+        self.search = search
+        self.after = tuple(after)
+
+    def query(self, cursor, schema, size):
+        query, params = build_order_search(*self.search, schema=schema)
+        cursor.row_factory = row_factory(Order)
+        return cursor.execute(query + " LIMIT ?", params + list(self.after) + [size]).fetchall()
+
+    def fetchmany(self, size):
+        orders = self.query(self.connection.cursor(), 'main', size)
+        archive_connection = db.connect()
+        try:
+            cursor = archive_connection.cursor()
+            for start in range(0, len(self.archives), MAX_ATTACHED):
+                schemas = []
+                for i, path in enumerate(self.archives[start:start + MAX_ATTACHED]):
+                    schema = f"archive_{i}"
+                    cursor.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+                    schemas.append(schema)
+                try:
+                    for schema in schemas:
+                        orders.extend(self.query(cursor, schema, size))
+                finally:
+                    for schema in schemas:
+                        cursor.execute(f"DETACH DATABASE {schema}")
+        finally:
+            archive_connection.close()
+        
+        orders.sort(key=lambda order: (order.order_time, order.id), reverse=True)
+        orders = orders[:size]
+        if orders:
+            self.after = (orders[-1].order_time, orders[-1].id)
+        return orders
+
+    def close(self):
+        pass
+
+def order_search(dish=None, table_number=None, since=None, until=None, status=None, connection=None,
+                 include_archive=False):
+    """Подготовить поиск заказов, вернуть функцию fetch(after) для page_rows
+
+    dish - слова из названия блюда, since и until - границы времени заказа
+    в формате хранения (until не включается), after - ключ последнего
+    показанного заказа или ORDER_KEY_START. include_archive - искать и в
+    архивах точки (archive.py); блюда ищутся по текущему меню, снимки
+    меню в архивах хранят те же номера блюд.
+    """
+    connection = connection or get_connection()
+    menu_ids = find_menu_ids(connection, dish) if dish and dish.strip() else None
+    search = (menu_ids, table_number, since, until, status)
+    
+    if include_archive:
+        archives = list_archives()
+        if archives:
+            return lambda after: ArchiveSearchCursor(connection, archives, search, after)
+    
+    query, params = build_order_search(*search)
+    
+    def fetch(after):
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory(Order)
+        return cursor.execute(query, params + list(after))
+    return fetch
+
+def search_orders(dish=None, table_number=None, since=None, until=None, status=None,
+                  after=ORDER_KEY_START, limit=SEARCH_PAGE_SIZE, include_archive=False):
+    """Найти заказы, от новых к старым, по одной странице
+
+    Возвращает (заказы, ключ следующей страницы). Ключ передается в after
+    за следующей страницей; None - страниц больше нет.
+    """
+    cursor = order_search(dish, table_number, since, until, status,
+                          include_archive=include_archive)(after)
+    orders = cursor.fetchmany(limit + 1)
+    cursor.close()
+    if len(orders) <= limit:
+        return orders, None
+    orders = orders[:limit]
+    return orders, (orders[-1].order_time, orders[-1].id)
+
+# ==================== ЭКРАН ПОИСКА ====================
+
+def order_lines_source():
+    """Функция render_row для найденных заказов и закрытие ее соединений
+
+    Позиции заказа, которого уже нет в горячей базе, читаются из архива
+    его месяца; соединения с архивами открываются один раз за поиск.
+    """
+    from functions import render_order
+    
+    connections = {}
+    
+    def render(order):
+        if run('order.status', (order.id,)).fetchone():
+            return render_order(order)
+        path = get_archive_path(order.order_time[:7].replace('-', '_'))
+        if path not in connections:
+            if not os.path.exists(path):
+                return render_order(order)
+            connections[path] = db.connect(path)
+        return render_order(order, connections[path])
+    
+    def close():
+        for connection in connections.values():
+            connection.close()
+    return render, close
+
+def searchOrdersMenu():
+    """Поиск заказов по блюду, столу и времени"""
+    render, close = order_lines_source()
+    try:
+        print("\n=== ПОИСК ЗАКАЗОВ ===")
+        print("Пустой ввод - без условия. Время - как в списке заказов.")
+        dish = input("Блюдо (слова из названия): ").strip() or None
+        table_text = input("Номер стола: ").strip()
+        table_number = int(table_text) if table_text else None
+        since_text = input("С (ГГГГ-ММ-ДД или ГГГГ-ММ-ДД ЧЧ:ММ): ").strip()
+        since = parse_search_time(since_text) if since_text else None
+        until_text = input("По (ГГГГ-ММ-ДД или ГГГГ-ММ-ДД ЧЧ:ММ): ").strip()
+        until = parse_search_time(until_text, end=True) if until_text else None
+        status = ORDER_STATUS_CHOICES.get(
+            input("Статус (1 - активные, 2 - завершенные, 3 - отмененные): ").strip())
+        include_archive = input("Искать и в архиве? (y/N): ").strip().lower() == 'y'
+        
+        found = page_rows(order_search(dish, table_number, since, until, status,
+                                       include_archive=include_archive),
+                          key=lambda order: (order.order_time, order.id),
+                          render_row=render,
+                          header=["", "=== НАЙДЕННЫЕ ЗАКАЗЫ ==="],
+                          empty="Заказы не найдены.",
+                          start=ORDER_KEY_START)
+        if found:
+            print(f"\nПоказано заказов: {found}")
+    except ValueError:
+        print("Ошибка: номер стола - число, время - в формате ГГГГ-ММ-ДД или ГГГГ-ММ-ДД ЧЧ:ММ!")
+    except Exception as e:
+        print(f"Ошибка при поиске заказов: {e}")
+    finally:
+        close()
+    input("\nНажмите Enter для выхода...")
@@ -0,0 +1,229 @@
+import os
+import threading
+from collections import Counter
+
+import db
+from models import MenuItem, Order, Reservation, TableStatus, select_columns, row_factory
+
+# Размер кэша подготовленных запросов на соединение (в sqlite3 по умолчанию
+# 128): с запасом вмещает каталог и запросы экспорта, собираемые build_select
+CACHED_STATEMENTS = int(os.environ.get('CAFE_CACHED_STATEMENTS', '256'))
+
+# Ключ (время заказа, номер) перед первым заказом в списках от новых к
+# старым (активные заказы, поиск): любое время заказа меньше этой строки
+ORDER_KEY_START = ('9999-12-31', 0)
+
+# ==================== КАТАЛОГ ЗАПРОСОВ ====================
+# Текст каждого запроса задан один раз: одинаковая строка находит готовый
+# запрос в кэше соединения, и sqlite не разбирает и не планирует его заново.
+# Запросы со списком IN (?, ...) переменной длины остаются в модулях.
+# Списки для экранов выбираются по ключу последней показанной строки
+# (screen.page_rows): первый параметр - ключ, с которого начать.
+
+STATEMENTS = {
+    # Столы
+    'table.list': f"""
+        SELECT {select_columns(TableStatus)}
+        FROM table_status
+        WHERE table_number > ?
+        ORDER BY table_number
+    """,
+    'table.exists': "SELECT 1 FROM table_status WHERE table_number = ?",
+    'table.set_status': """
+        UPDATE table_status SET status = ?, last_updated = CURRENT_TIMESTAMP
+        WHERE table_number = ?
+    """,
+    # Проверка и занятие стола одним UPDATE: две кассы не займут один стол
+    'table.occupy': """
+        UPDATE table_status SET status = 'occupied', last_updated = CURRENT_TIMESTAMP
+        WHERE table_number = ? AND status = 'free'
+    """,
+
+    # Меню
+    'menu.list': f"SELECT {select_columns(MenuItem)} FROM menu WHERE id > ? ORDER BY id",
+    'menu.title': "SELECT title FROM menu WHERE id = ?",
+    'menu.insert': """
+        INSERT INTO menu (title, price, station, prep_minutes, course)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'menu.in_active_orders': """
+        SELECT 1 FROM order_items oi
+        JOIN orders o ON oi.order_id = o.id
+        WHERE oi.menu_id = ? AND o.status = 'active'
+    """,
+    'menu.delete': "DELETE FROM menu WHERE id = ?",
+
+    # Заказы
+    'order.active': f"""
+        SELECT {select_columns(Order, 'o')}
+        FROM orders o
+        WHERE o.status = 'active' AND (o.order_time, o.id) < (?, ?)
+        ORDER BY o.order_time DESC, o.id DESC
+    """,
+    'order.insert': "INSERT INTO orders (table_number) VALUES (?)",
+    'order.status': "SELECT status FROM orders WHERE id = ?",
+    'order.table': "SELECT table_number FROM orders WHERE id = ?",
+    'order.set_status': "UPDATE orders SET status = ? WHERE id = ?",
+    'order.lines': """
+        SELECT m.title, m.price, oi.quantity
+        FROM order_items oi
+        JOIN menu m ON oi.menu_id = m.id
+        WHERE oi.order_id = ?
+    """,
+    'order_item.insert': "INSERT INTO order_items (order_id, menu_id, quantity) VALUES (?, ?, ?)",
+    'order_item.title': """
+        SELECT m.title FROM order_items oi
+        JOIN menu m ON oi.menu_id = m.id
+        WHERE oi.order_id = ? AND oi.menu_id = ?
+    """,
+    'order_item.delete': "DELETE FROM order_items WHERE order_id = ? AND menu_id = ?",
+
+    # Брони (reservations.py, свое соединение без неявных транзакций)
+    'reservation.tables': "SELECT seats, table_number FROM table_status ORDER BY seats, table_number",
+    # Прошедшие брони индексу не нужны: параметр - текущее время
+    'reservation.active': f"""
+        SELECT {select_columns(Reservation)}
+        FROM reservations
+        WHERE status = 'active' AND end_time > ?
+        ORDER BY table_number, start_time
+    """,
+    'reservation.get_active': f"""
+        SELECT {select_columns(Reservation)}
+        FROM reservations
+        WHERE id = ? AND status = 'active'
+    """,
+    'reservation.for_day': f"""
+        SELECT {select_columns(Reservation)}
+        FROM reservations
+        WHERE start_time >= ? AND start_time < ? AND status = 'active'
+        ORDER BY start_time, table_number
+    """,
+    'reservation.overlap': """
+        SELECT 1 FROM reservations
+        WHERE table_number = ? AND start_time < ? AND end_time > ? AND status = 'active'
+        LIMIT 1
+    """,
+    'reservation.insert': """
+        INSERT INTO reservations (table_number, start_time, end_time, guests, guest_name, phone)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'reservation.cancel': "UPDATE reservations SET status = 'cancelled' WHERE id = ?",
+    'reservation.version': "SELECT version FROM reservations_version",
+    'reservation.data_version': "PRAGMA data_version",
+    'table.set_seats': "UPDATE table_status SET seats = ? WHERE table_number = ?",
+
+    # Архивация (archive.py): статусы передаются параметрами
+    'archive.next_batch': """
+        SELECT id, strftime('%Y_%m', order_time)
+        FROM orders
+        WHERE status IN (?, ?) AND order_time < datetime('now', ?)
+        ORDER BY id
+        LIMIT ?
+    """,
+
+    # Поиск по истории заказов
+    'search.has_fts': "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu_fts'",
+    'search.menu_fts': "SELECT rowid FROM menu_fts WHERE menu_fts MATCH ?",
+    'search.menu_titles': "SELECT id, title FROM menu",
+
+    # Кухня и бар
+    'kitchen.pending_items': """
+        SELECT oi.rowid, oi.order_id, m.station
+        FROM order_items oi
+        JOIN orders o ON oi.order_id = o.id
+        JOIN menu m ON oi.menu_id = m.id
+        WHERE oi.ticket_id IS NULL AND o.status = 'active'
+    """,
+    'kitchen.open_ticket': """
+        SELECT id FROM kitchen_tickets
+        WHERE order_id = ? AND station = ? AND status = 'new'
+        ORDER BY id DESC LIMIT 1
+    """,
+    'kitchen.ticket_insert': "INSERT INTO kitchen_tickets (order_id, station) VALUES (?, ?)",
+    'kitchen.station_queue': """
+        SELECT t.id, t.order_id, o.table_number, t.station, t.status, t.created_at,
+               o.order_time, MIN(m.course), MAX(m.prep_minutes)
+        FROM kitchen_tickets t
+        JOIN orders o ON t.order_id = o.id
+        JOIN order_items oi ON oi.ticket_id = t.id
+        JOIN menu m ON oi.menu_id = m.id
+        WHERE t.station = ? AND t.status != 'done' AND o.status = 'active'
+        GROUP BY t.id
+    """,
+    'kitchen.ticket_start': """
+        UPDATE kitchen_tickets SET status = 'in_progress', started_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND status = 'new'
+    """,
+    'kitchen.ticket_done': """
+        UPDATE kitchen_tickets
+        SET status = 'done', started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+            done_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND status != 'done'
+    """,
+    'kitchen.metrics_done': """
+        SELECT
+            SUM(done_at >= datetime('now', '-1 hour')),
+            COUNT(*),
+            AVG((julianday(started_at) - julianday(created_at)) * 1440),
+            AVG((julianday(done_at) - julianday(started_at)) * 1440)
+        FROM kitchen_tickets
+        WHERE station = ? AND status = 'done' AND done_at >= datetime('now', '-1 day')
+    """,
+    # Те же тикеты, что в очереди станции: заказ активен и в тикете есть позиции
+    'kitchen.metrics_queue': """
+        SELECT COUNT(*), MAX((julianday('now') - julianday(t.created_at)) * 1440)
+        FROM kitchen_tickets t
+        JOIN orders o ON t.order_id = o.id
+        WHERE t.station = ? AND t.status != 'done' AND o.status = 'active'
+          AND EXISTS (SELECT 1 FROM order_items oi WHERE oi.ticket_id = t.id)
+    """,
+}
+
+# ==================== ВЫПОЛНЕНИЕ ====================
+
+# Соединения живут всю работу программы: свое у каждого потока (sqlite3
+# не разрешает делить соединение между потоками) и у каждой базы
+_local = threading.local()
+
+# Имя запроса -> сколько раз выполнен
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+def get_connection():
+    """Долгоживущее соединение потока с базой текущей точки
+
+    Пересоздается при смене точки и при включении или выключении
+    профилирования запросов.
+    """
+    key = (db.DB, db.PROFILE_QUERIES)
+    if getattr(_local, 'key', None) != key:
+        if getattr(_local, 'connection', None) is not None:
+            _local.connection.close()
+        _local.connection = db.connect(cached_statements=CACHED_STATEMENTS)
+        _local.key = key
+    return _local.connection
+
+def run(name, params=(), model=None, connection=None):
+    """Выполнить запрос каталога по имени, вернуть курсор
+
+    model - NamedTuple из models.py для строк результата. Без connection
+    запрос выполняется на соединении потока; изменения фиксирует
+    вызывающий код (with get_connection(): ...).
+    """
+    sql = STATEMENTS[name]
+    with _counts_lock:
+        _counts[name] += 1
+    cursor = (connection or get_connection()).cursor()
+    if model is not None:
+        cursor.row_factory = row_factory(model)
+    return cursor.execute(sql, params)
+
+def get_statement_counts():
+    """Счетчики выполнения запросов каталога: [(имя, количество)] по убыванию"""
+    with _counts_lock:
+        return _counts.most_common()
+
+def reset_statement_counts():
+    """Обнулить счетчики запросов каталога"""
+    with _counts_lock:
+        _counts.clear()
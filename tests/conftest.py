@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def make_database(path):
+    """Создать базу с миграциями и тремя блюдами меню"""
+    old_db = db.DB
+    db.DB = str(path)
+    try:
+        db.init_db()
+        connection = db.connect()
+        connection.executemany(
+            "INSERT INTO menu (title, price, station, prep_minutes, course) VALUES (?, ?, ?, ?, ?)",
+            [('Борщ', 300, 'kitchen', 15, 2), ('Чай', 50, 'bar', 2, 1), ('Торт', 200, 'kitchen', 5, 3)])
+        connection.commit()
+        connection.close()
+    finally:
+        db.DB = old_db
+    return str(path)
+
+
+@pytest.fixture
+def cafe_db(tmp_path, monkeypatch):
+    """Временная база кафе, сделанная текущей точкой"""
+    path = make_database(tmp_path / 'cafe.db')
+    monkeypatch.setattr(db, 'DB', path)
+    monkeypatch.setattr(db, 'LOCATION', 'test')
+    monkeypatch.setattr(db, 'LOCATIONS', {'test': path})
+    return path
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+
+import pytest
+
+import archive
+import db
+import functions
+import reports
+
+
+@pytest.fixture
+def archive_dir(cafe_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    return tmp_path / 'archive'
+
+
+def completed_order(table_number, dishes, days_ago=40):
+    order_id = functions.open_order(table_number)
+    for dish_id, quantity in dishes:
+        functions.add_order_item(order_id, dish_id, quantity)
+    functions.set_order_status(order_id, 'completed')
+    connection = db.connect()
+    connection.execute("UPDATE orders SET order_time = datetime('now', ?) WHERE id = ?",
+                       (f'-{days_ago} days', order_id))
+    connection.commit()
+    connection.close()
+    return order_id
+
+
+def archive_rows(month, query, params=()):
+    connection = sqlite3.connect(archive.get_archive_path(month))
+    try:
+        return connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+
+
+def report_with_archive():
+    connection = db.connect()
+    try:
+        return reports.collect_database_report(connection, include_archive=True)
+    finally:
+        connection.close()
+
+
+def test_archive_moves_orders_and_keeps_report(archive_dir):
+    completed_order(1, [(1, 2), (2, 1)])
+    completed_order(2, [(3, 1)], days_ago=0)
+    before = report_with_archive()
+
+    moved = archive.archive_orders(days=30)
+
+    assert sum(moved.values()) == 1
+    assert db.query_table('orders', limit=None)[0][0]['table_number'] == 2
+    assert report_with_archive()['revenue'] == before['revenue'] == 850
+
+
+def test_failed_batch_leaves_orders_only_in_main(archive_dir):
+    order_id = completed_order(1, [(1, 2), (2, 1)])
+    month = db.connect().execute("SELECT strftime('%Y_%m', order_time) FROM orders").fetchone()[0]
+
+    # Сбой на удалении из горячей базы откатывает и копию в архиве
+    class FailingDelete(sqlite3.Cursor):
+        def execute(self, sql, params=()):
+            if sql.startswith("DELETE FROM main."):
+                raise sqlite3.OperationalError("сбой")
+            return super().execute(sql, params)
+
+    class FailingConnection(sqlite3.Connection):
+        def cursor(self, factory=FailingDelete):
+            return super().cursor(factory)
+
+    connection = db.connect(isolation_level=None, factory=FailingConnection)
+    with pytest.raises(sqlite3.OperationalError):
+        archive.archive_batch(connection, month, [order_id])
+    connection.close()
+    assert archive_rows(month, "SELECT COUNT(*) FROM order_items")[0][0] == 0
+    assert len(db.query_table('order_items', limit=None)[0]) == 2
+    assert report_with_archive()['revenue'] == 650
+
+    archive.archive_orders(days=30)
+
+    assert archive_rows(month, "SELECT COUNT(*) FROM order_items WHERE order_id = ?", (order_id,))[0][0] == 2
+    assert db.query_table('order_items', limit=None)[0] == []
+    assert report_with_archive()['revenue'] == 650
+
+
+def test_archive_rerun_over_leftover_copy_does_not_duplicate(archive_dir):
+    order_id = completed_order(1, [(1, 2), (2, 1)])
+    month = db.connect().execute("SELECT strftime('%Y_%m', order_time) FROM orders").fetchone()[0]
+
+    # Копия заказа, оставшаяся в архиве от прерванного переноса
+    os.makedirs(archive_dir)
+    connection = db.connect(isolation_level=None)
+    connection.execute("ATTACH DATABASE ? AS archive", (archive.get_archive_path(month),))
+    archive.prepare_archive_schema(connection.cursor())
+    for table_name, order_column in archive.ARCHIVE_TABLES:
+        connection.execute(f"INSERT INTO archive.{table_name} SELECT * FROM main.{table_name}")
+    connection.execute("DETACH DATABASE archive")
+    connection.close()
+
+    archive.archive_orders(days=30)
+
+    assert archive_rows(month, "SELECT COUNT(*) FROM order_items WHERE order_id = ?", (order_id,))[0][0] == 2
+    assert archive_rows(month, "SELECT COUNT(*) FROM orders")[0][0] == 1
+    assert db.query_table('order_items', limit=None)[0] == []
+    assert report_with_archive()['revenue'] == 650
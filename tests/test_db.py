@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+import db
+import functions
+import kitchen
+import statements
+
+
+@pytest.fixture
+def tickets(cafe_db):
+    """Семь тикетов, у части не заполнено started_at"""
+    for table_number in range(1, 8):
+        order_id = functions.open_order(table_number)
+        functions.add_order_item(order_id, 1 + table_number % 2, 1)
+    connection = statements.get_connection()
+    kitchen.route_pending_items(connection)
+    for ticket_id in (2, 3, 5):
+        kitchen.set_ticket_status(connection, ticket_id, 'in_progress')
+    return cafe_db
+
+
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('page_size', [1, 2, 3, 500])
+def test_iter_table_keyset_on_nullable_column(tickets, descending, page_size):
+    rows = list(db.iter_table('kitchen_tickets', columns=['id', 'started_at'],
+                              order_by='started_at', descending=descending, page_size=page_size))
+    assert sorted(row['id'] for row in rows) == list(range(1, 8))
+    # NULL первыми при возрастании и последними при убывании, как в sqlite
+    nulls = [row['started_at'] is None for row in rows]
+    assert nulls == sorted(nulls, reverse=not descending)
+
+
+@pytest.mark.parametrize('order_by', [None, 'id', 'table_number'])
+def test_iter_table_pages_match_single_query(tickets, order_by):
+    expected = db.query_table('orders', order_by=order_by, limit=None)[0]
+    assert list(db.iter_table('orders', order_by=order_by, page_size=2)) == expected
+
+
+def test_build_select_rejects_unknown_columns(cafe_db):
+    with pytest.raises(ValueError):
+        db.build_select('orders', order_by='missing')
+    with pytest.raises(ValueError):
+        db.build_select('missing')
+
+
+class RacingCursor(sqlite3.Cursor):
+    """Курсор, перед BEGIN IMMEDIATE которого базу мигрирует другой терминал"""
+
+    def execute(self, sql, *args):
+        if sql == "BEGIN IMMEDIATE" and self.connection.rival is not None:
+            rival, self.connection.rival = self.connection.rival, None
+            assert db.run_migrations(rival) == len(db.MIGRATIONS)
+        return super().execute(sql, *args)
+
+
+class RacingConnection(sqlite3.Connection):
+    rival = None
+
+    def cursor(self, factory=RacingCursor):
+        return super().cursor(factory)
+
+
+def test_migrations_reread_version_under_lock(tmp_path):
+    path = str(tmp_path / 'race.db')
+    rival = db.connect(path)
+    connection = db.connect(path, factory=RacingConnection)
+    connection.rival = rival
+
+    assert db.run_migrations(connection) == 0
+    assert connection.rival is None
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+    rival.close()
+    connection.close()
+
+
+def test_execute_script_stays_in_transaction(tmp_path):
+    connection = db.connect(str(tmp_path / 'script.db'))
+    connection.execute("BEGIN IMMEDIATE")
+    db.execute_script(connection.cursor(), """
+        CREATE TABLE t (x);
+        CREATE TRIGGER t_insert AFTER INSERT ON t BEGIN
+            SELECT 1; SELECT 2;
+        END;
+    """)
+    assert connection.in_transaction
+    connection.rollback()
+    assert connection.execute("SELECT name FROM sqlite_master").fetchall() == []
+    connection.close()
+
+
+def test_paging_reuses_the_callers_connection(tickets, monkeypatch):
+    connection = db.connect()
+    expected = list(db.iter_table('orders', page_size=2))
+
+    def no_connect(*args, **kwargs):
+        raise AssertionError("страница открыла свое соединение")
+
+    monkeypatch.setattr(db, 'connect', no_connect)
+    assert list(db.iter_table('orders', page_size=2, connection=connection)) == expected
+    connection.close()
+
+
+def test_query_table_returns_selected_columns_and_key(cafe_db):
+    rows, after = db.query_table('menu', columns=['title'], order_by='price', limit=2)
+    assert rows == [{'title': 'Чай'}, {'title': 'Торт'}]
+    assert after == (200, 3)
+    rows, after = db.query_table('menu', columns=['title'], order_by='price', after=after, limit=2)
+    assert rows == [{'title': 'Борщ'}]
+    assert after is None
@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+import diagnostics
+import statements
+
+
+def test_slow_log_records_parameter_types_not_values(tmp_path, monkeypatch):
+    log = tmp_path / 'slow.log'
+    monkeypatch.setattr(diagnostics, 'SLOW_QUERY_LOG', str(log))
+    monkeypatch.setattr(diagnostics, 'SLOW_QUERY_MS', 0)
+    diagnostics.record_query("SELECT * FROM reservations WHERE phone = ? AND guests = ?",
+                             ('+7 900 123-45-67', 4), 0.5, ('cafe.db', False))
+    diagnostics.record_query("INSERT INTO menu (title) VALUES (?)", None, 0.5, ('cafe.db', False))
+
+    text = log.read_text(encoding='utf-8')
+    assert '900' not in text
+    assert 'параметров 2: str, int' in text
+    assert 'пакет параметров' in text
+
+
+def test_fts_search_is_not_a_full_scan(cafe_db):
+    plan, warnings = diagnostics.explain_query(statements.STATEMENTS['search.menu_fts'], (cafe_db, False))
+    assert any('VIRTUAL TABLE INDEX' in detail for detail in plan)
+    assert warnings == []
+
+
+def test_cursor_iteration_is_timed(cafe_db, tmp_path, monkeypatch):
+    log = tmp_path / 'slow.log'
+    monkeypatch.setattr(diagnostics, 'SLOW_QUERY_LOG', str(log))
+    monkeypatch.setattr(diagnostics, 'SLOW_QUERY_MS', 35)
+    diagnostics.reset_stats()
+
+    # Часы идут на 10 мс за вызов: execute и каждый шаг перебора - по 10 мс
+    clock = iter(range(1000))
+    monkeypatch.setattr(diagnostics.time, 'perf_counter', lambda: next(clock) * 0.01)
+    connection = sqlite3.connect(cafe_db, factory=diagnostics.ProfiledConnection)
+    sql = "SELECT id FROM menu"
+    assert [row[0] for row in connection.execute(sql)] == [1, 2, 3]
+    connection.close()
+
+    stats = diagnostics._query_stats[diagnostics.normalize_sql(sql)]
+    assert stats['count'] == 1
+    assert stats['total'] == pytest.approx(0.05)
+    assert len(log.read_text(encoding='utf-8').splitlines()) == 1
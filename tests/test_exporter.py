@@ -0,0 +1,157 @@
+import gc
+import json
+import os
+import weakref
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import db
+import exporter
+import functions
+import statements
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, 'OUTPUT_DIR', str(tmp_path / 'out'))
+    return tmp_path / 'out'
+
+
+@pytest.fixture
+def orders(cafe_db):
+    for table_number, dishes in ((1, [1, 2]), (2, [3]), (3, [])):
+        order_id = functions.open_order(table_number)
+        for dish_id in dishes:
+            functions.add_order_item(order_id, dish_id, 2)
+    return cafe_db
+
+
+def reference_xml(data, table_name, filename):
+    """Прежний экспорт в XML через ElementTree"""
+    def fill(data, parent):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                fill(value, ET.SubElement(parent, key))
+            elif isinstance(value, list):
+                container = ET.SubElement(parent, key)
+                for item in value:
+                    if isinstance(item, dict):
+                        fill(item, ET.SubElement(container, "item"))
+                    else:
+                        ET.SubElement(container, "item").text = str(item)
+            else:
+                ET.SubElement(parent, key).text = str(value) if value is not None else ""
+
+    root = ET.Element(table_name)
+    for item in data:
+        fill(item, ET.SubElement(root, "record"))
+    ET.ElementTree(root).write(filename, encoding='utf-8', xml_declaration=True)
+
+
+@pytest.mark.parametrize('data', [
+    [],
+    [{}],
+    [{'id': 1, 'title': 'Борщ & <щи>', 'price': None, 'empty': ''},
+     {'id': 2, 'menu': {'id': 3, 'title': 'Чай'}, 'items': [{'a': 1}, {}, 'x', ''], 'none': []}],
+])
+def test_xml_matches_element_tree(output_dir, tmp_path, data):
+    exporter.ensure_output_dir()
+    exporter.export_to_xml(data, 'orders')
+    reference_xml(data, 'orders', tmp_path / 'reference.xml')
+    assert (output_dir / 'orders.xml').read_bytes() == (tmp_path / 'reference.xml').read_bytes()
+
+
+def test_export_writes_all_formats_in_one_pass(orders, output_dir, monkeypatch):
+    records = list(exporter.iter_export_records('orders', depth=2))
+    refs = []
+
+    class Record(dict):
+        pass
+
+    def stream(*args, **kwargs):
+        for record in records:
+            record = Record(record)
+            refs.append(weakref.ref(record))
+            yield record
+            del record
+            gc.collect()
+            # Экспорт не держит прочитанные записи: жива только текущая
+            assert sum(ref() is not None for ref in refs) <= 1
+
+    monkeypatch.setattr(exporter, 'iter_export_records', stream)
+    assert exporter.export_table_data('orders', depth=2, json_lines=True) == 3
+
+    lines = (output_dir / 'orders.jsonl').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [1, 2, 3]
+    assert sorted(os.listdir(output_dir)) == ['orders.csv', 'orders.jsonl', 'orders.txt', 'orders.xml']
+
+
+def test_export_matches_single_format_writers(orders, output_dir, tmp_path):
+    exporter.export_table_data('order_items', depth=2)
+    data = list(exporter.iter_export_records('order_items', depth=2))
+    streamed = {name: (output_dir / name).read_bytes() for name in os.listdir(output_dir)}
+
+    structure_columns = exporter.get_table_structure('order_items')['columns']
+    plan = exporter.build_relation_plan('order_items', 2)
+    exporter.export_to_json(data, 'order_items')
+    exporter.export_to_csv(data, 'order_items', structure_columns, plan)
+    exporter.export_to_xml(data, 'order_items')
+    exporter.export_to_txt(data, 'order_items')
+    assert {name: (output_dir / name).read_bytes() for name in os.listdir(output_dir)} == streamed
+    assert json.loads(streamed['order_items.json'])[0]['menu']['title'] == 'Борщ'
+
+
+def test_csv_header_has_no_duplicate_columns(orders, output_dir):
+    exporter.export_table_data('order_items', depth=2)
+    with open(output_dir / 'order_items.csv', encoding='utf-8-sig') as f:
+        header = f.readline().strip().split(',')
+    assert len(header) == len(set(header))
+    assert 'menu_id' in header and 'menu.id' in header
+
+
+def test_reverse_relations_are_not_memoized(orders):
+    plan = exporter.build_relation_plan('orders', 2)
+    records = db.query_table('orders', limit=None)[0]
+    memo = {}
+    connection = db.connect()
+    exporter.expand_relations(connection.cursor(), records, plan, memo)
+    connection.close()
+
+    assert [len(record.get('order_items', [])) for record in records] == [2, 1, 0]
+    assert ('menu', 'id') in memo
+    assert ('order_items', 'order_id') not in memo
+
+    paged = list(exporter.iter_export_records('orders', depth=2, page_size=2))
+    assert paged == list(exporter.iter_export_records('orders', depth=2, page_size=100))
+
+
+def test_invalid_export_keeps_previous_files(orders, output_dir):
+    exporter.export_table_data('menu')
+    before = {name: (output_dir / name).read_bytes() for name in os.listdir(output_dir)}
+
+    with pytest.raises(ValueError):
+        exporter.export_table_data('menu', columns=['titel'])
+    with pytest.raises(ValueError):
+        exporter.export_table_data('menu', filters=[('price', '~', 1)])
+
+    assert {name: (output_dir / name).read_bytes() for name in os.listdir(output_dir)} == before
+
+
+def test_export_menu_reports_validation_errors(orders, output_dir, monkeypatch, capsys):
+    answers = iter(['2', 'titel', '', '', '', ''])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    exporter.export_data_menu()
+    out = capsys.readouterr().out
+    assert 'нет колонки titel' in out
+    assert 'введите число' not in out
+
+
+def test_export_pages_run_on_the_catalog_connection(orders, monkeypatch):
+    statements.get_connection()
+
+    def no_connect(*args, **kwargs):
+        raise AssertionError("экспорт открыл свое соединение")
+
+    monkeypatch.setattr(db, 'connect', no_connect)
+    assert len(list(exporter.iter_export_records('order_items', depth=2, page_size=1))) == 3
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+import functions
+import kitchen
+import statements
+
+
+def queue_state(station='kitchen'):
+    connection = statements.get_connection()
+    kitchen.route_pending_items(connection)
+    queue = kitchen.get_station_queue(connection, station)
+    return queue, kitchen.get_station_metrics(connection, station)
+
+
+def test_metrics_queue_matches_station_queue(cafe_db):
+    cancelled = functions.open_order(1)
+    functions.add_order_item(cancelled, 1, 1)
+    active = functions.open_order(2)
+    functions.add_order_item(active, 1, 1)
+
+    queue, metrics = queue_state()
+    assert len(queue) == metrics['queue_length'] == 2
+
+    functions.set_order_status(cancelled, 'cancelled')
+    queue, metrics = queue_state()
+    assert [ticket.order_id for ticket in queue] == [active]
+    assert metrics['queue_length'] == 1
+
+
+def test_queue_priority_follows_order_time_not_routing_time(cafe_db):
+    old_order = functions.open_order(1)
+    new_order = functions.open_order(2)
+    connection = statements.get_connection()
+    with connection:
+        connection.execute("UPDATE orders SET order_time = datetime('now', '-30 minutes') WHERE id = ?",
+                           (old_order,))
+
+    # Новый заказ разложен раньше старого
+    functions.add_order_item(new_order, 1, 1)
+    kitchen.route_pending_items(connection)
+    functions.add_order_item(old_order, 1, 1)
+    kitchen.route_pending_items(connection)
+    with connection:
+        connection.execute("UPDATE kitchen_tickets SET created_at = datetime('now', '-1 hour') WHERE order_id = ?",
+                           (new_order,))
+
+    queue = kitchen.get_station_queue(connection, 'kitchen')
+    assert [ticket.order_id for ticket in queue] == [old_order, new_order]
+
+
+def test_show_station_queue(cafe_db, capsys):
+    order_id = functions.open_order(3)
+    functions.add_order_item(order_id, 1, 2)
+    kitchen.show_station_queue(statements.get_connection(), 'kitchen')
+    output = capsys.readouterr().out
+    assert f"Заказ #{order_id}" in output
+    assert "Борщ x2" in output
+
+
+def test_failed_routing_releases_write_lock(cafe_db, monkeypatch):
+    order_id = functions.open_order(1)
+    functions.add_order_item(order_id, 1, 1)
+    connection = statements.get_connection()
+    insert = statements.STATEMENTS['kitchen.ticket_insert']
+
+    monkeypatch.setitem(statements.STATEMENTS, 'kitchen.ticket_insert', "INSERT INTO missing VALUES (?, ?)")
+    with pytest.raises(sqlite3.OperationalError):
+        kitchen.route_pending_items(connection)
+    assert not connection.in_transaction
+
+    monkeypatch.setitem(statements.STATEMENTS, 'kitchen.ticket_insert', insert)
+    assert kitchen.route_pending_items(connection) == 1
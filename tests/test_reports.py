@@ -0,0 +1,30 @@
+import db
+import functions
+import reports
+from conftest import make_database
+
+
+def test_federated_report_in_process_keeps_current_location(cafe_db, tmp_path):
+    other = make_database(tmp_path / 'cafe2.db')
+    order_id = functions.open_order(1)
+    functions.add_order_item(order_id, 1, 2)
+    functions.set_order_status(order_id, 'completed')
+
+    total, by_location, errors = reports.federated_report({'a': cafe_db, 'b': other}, workers=1)
+
+    assert errors == {}
+    assert db.DB == cafe_db
+    assert by_location['a']['revenue'] == 600
+    assert by_location['b']['revenue'] == 0
+    assert total['completed_orders'] == 1
+
+
+def test_location_report_path_with_uri_characters(tmp_path):
+    folder = tmp_path / 'кафе #1 %20?'
+    folder.mkdir()
+    path = make_database(folder / 'cafe.db')
+
+    report = reports.collect_location_report(path)
+
+    assert report['revenue'] == 0
+    assert sorted(p.name for p in folder.iterdir()) == ['cafe.db']
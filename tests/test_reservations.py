@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+import reservations
+from models import Reservation
+
+
+@pytest.fixture
+def index_db(cafe_db, monkeypatch):
+    """База броней с чистым индексом модуля"""
+    monkeypatch.setattr(reservations, '_connection', None)
+    monkeypatch.setattr(reservations, '_connection_db', None)
+    monkeypatch.setattr(reservations, '_index', None)
+    yield cafe_db
+    if reservations._connection is not None:
+        reservations._connection.close()
+
+
+def external_insert(path, table_number, start, end):
+    """Бронь, сделанная другой кассой"""
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute(
+            "INSERT INTO reservations (table_number, start_time, end_time, guests) VALUES (?, ?, ?, 2)",
+            (table_number, start, end))
+    connection.close()
+
+
+def racing_index(path, table_number):
+    """get_reservation_index, после которого другая касса бронирует стол"""
+    get_index = reservations.get_reservation_index
+
+    def get_racing_index():
+        index = get_index()
+        external_insert(path, table_number, '2030-01-01 18:00', '2030-01-01 20:00')
+        return index
+    return get_racing_index
+
+
+def test_book_reloads_index_after_concurrent_booking(index_db, monkeypatch):
+    monkeypatch.setattr(reservations, 'get_reservation_index', racing_index(index_db, 2))
+    reservations.book_table(1, '2030-01-01 18:00', '2030-01-01 20:00', 2)
+
+    index = reservations._index
+    assert not index.is_free(1, '2030-01-01 18:30', '2030-01-01 19:00')
+    assert not index.is_free(2, '2030-01-01 18:30', '2030-01-01 19:00')
+
+
+def test_cancel_reloads_index_after_concurrent_booking(index_db, monkeypatch):
+    reservation_id = reservations.book_table(1, '2030-01-01 18:00', '2030-01-01 20:00', 2)
+    monkeypatch.setattr(reservations, 'get_reservation_index', racing_index(index_db, 2))
+    assert reservations.cancel_reservation(reservation_id)
+
+    index = reservations._index
+    assert index.is_free(1, '2030-01-01 18:30', '2030-01-01 19:00')
+    assert not index.is_free(2, '2030-01-01 18:30', '2030-01-01 19:00')
+
+
+def test_index_skips_and_prunes_finished_reservations(index_db):
+    external_insert(index_db, 1, '2000-01-01 18:00', '2000-01-01 20:00')
+    index = reservations.get_reservation_index()
+    assert index.slots[1] == []
+
+    index.add(Reservation(100, 2, '2000-01-02 18:00', '2000-01-02 20:00', 2, '', ''))
+    index.add(Reservation(101, 2, '2030-01-02 18:00', '2030-01-02 20:00', 2, '', ''))
+    index.prune('2010-01-01 00:00')
+    assert [reservation.id for reservation in index.slots[2]] == [101]
+    assert index.starts[2] == ['2030-01-02 18:00']
+
+
+def test_change_during_first_load_is_noticed(index_db, monkeypatch):
+    load = reservations.ReservationIndex.load
+
+    # Другая касса бронирует стол сразу после первой загрузки индекса
+    def racing_load(self, connection):
+        load(self, connection)
+        monkeypatch.setattr(reservations.ReservationIndex, 'load', load)
+        external_insert(index_db, 2, '2030-01-01 18:00', '2030-01-01 20:00')
+
+    monkeypatch.setattr(reservations.ReservationIndex, 'load', racing_load)
+    reservations.get_reservation_index()
+    index = reservations.get_reservation_index()
+    assert not index.is_free(2, '2030-01-01 18:30', '2030-01-01 19:00')
+
+
+def test_book_confirms_busy_table_in_database(index_db):
+    index = reservations.get_reservation_index()
+    # Индекс считает стол занятым бронью, которой в базе уже нет
+    index.add(Reservation(999, 1, '2030-01-01 18:00', '2030-01-01 20:00', 2, '', ''))
+
+    reservation_id = reservations.book_table(1, '2030-01-01 18:00', '2030-01-01 20:00', 2)
+    assert [reservation.id for reservation in reservations._index.slots[1]] == [reservation_id]
+    with pytest.raises(ValueError):
+        reservations.book_table(1, '2030-01-01 19:00', '2030-01-01 21:00', 2)
@@ -0,0 +1,82 @@
+import pytest
+
+import screen
+
+
+class ListCursor:
+    """Курсор над списком чисел, запоминает размеры fetchmany"""
+
+    def __init__(self, rows, sizes):
+        self.rows = rows
+        self.sizes = sizes
+
+    def fetchmany(self, size):
+        self.sizes.append(size)
+        return self.rows[:size]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pager(monkeypatch, capsys):
+    """page_rows на странице в 5 строк; ответы на вопрос 'дальше?' - answers"""
+    monkeypatch.setattr(screen, 'PAGE_ROWS', 5)
+    state = {'answers': [], 'asked': 0, 'sizes': []}
+
+    def fake_input(prompt=''):
+        state['asked'] += 1
+        return state['answers'].pop(0) if state['answers'] else ''
+
+    monkeypatch.setattr('builtins.input', fake_input)
+
+    def run(count, heights=None, empty="пусто", answers=()):
+        heights = heights or {}
+        state['answers'] = list(answers)
+        rows = list(range(1, count + 1))
+        shown = screen.page_rows(
+            lambda after: ListCursor([row for row in rows if row > after], state['sizes']),
+            key=lambda row: row,
+            render_row=lambda row: [f"{row}"] + [f"{row}+"] * (heights.get(row, 1) - 1),
+            header=["H"], empty=empty, start=0)
+        lines = capsys.readouterr().out.splitlines()
+        return shown, lines, state
+    return run
+
+
+def test_page_that_fits_exactly_asks_nothing(pager):
+    shown, lines, state = pager(4)
+    assert shown == 4
+    assert lines == ["H", "1", "2", "3", "4"]
+    assert state['asked'] == 0
+    assert state['sizes'] == [6]
+
+
+def test_pages_repeat_header_and_continue_after_key(pager):
+    shown, lines, state = pager(9)
+    assert shown == 9
+    assert lines == ["H", "1", "2", "3", "4", "H", "5", "6", "7", "8", "H", "9"]
+    assert state['asked'] == 2
+
+
+def test_record_moves_whole_to_next_page(pager):
+    shown, lines, state = pager(3, heights={2: 4})
+    assert lines == ["H", "1", "H", "2", "2+", "2+", "2+", "H", "3"]
+    assert shown == 3
+
+
+def test_record_taller_than_page_is_still_shown(pager):
+    shown, lines, state = pager(2, heights={1: 7})
+    assert lines == ["H", "1"] + ["1+"] * 6 + ["H", "2"]
+    assert shown == 2
+
+
+def test_quit_stops_paging(pager):
+    shown, lines, state = pager(9, answers=['q'])
+    assert shown == 4
+    assert lines == ["H", "1", "2", "3", "4"]
+
+
+def test_empty_result(pager):
+    assert pager(0)[:2] == (0, ["пусто"])
+    assert pager(0, empty=None)[:2] == (0, ["H"])
@@ -0,0 +1,78 @@
+import pytest
+
+import archive
+import db
+import functions
+import search
+import statements
+
+
+@pytest.fixture
+def orders(cafe_db, tmp_path, monkeypatch):
+    """Шесть заказов: у нечетных чай, у двух старых - торт"""
+    monkeypatch.setattr(archive, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    order_ids = []
+    for n in range(6):
+        order_id = functions.open_order(n + 1)
+        functions.add_order_item(order_id, 2 if n % 2 else 1, 1)
+        if n < 2:
+            functions.add_order_item(order_id, 3, 1)
+        functions.set_order_status(order_id, 'completed')
+        order_ids.append(order_id)
+
+    connection = db.connect()
+    for n, order_id in enumerate(order_ids):
+        connection.execute("UPDATE orders SET order_time = datetime('now', ?) WHERE id = ?",
+                           (f'-{60 - n * 10} days', order_id))
+    connection.commit()
+    connection.close()
+    return order_ids
+
+
+def all_pages(limit, **kwargs):
+    found = []
+    after = statements.ORDER_KEY_START
+    while after is not None:
+        page, after = search.search_orders(after=after, limit=limit, **kwargs)
+        assert len(page) <= limit
+        found.extend(order.id for order in page)
+    return found
+
+
+def test_parse_search_time_end_of_day():
+    assert search.parse_search_time('2025-11-21') == '2025-11-21 00:00:00'
+    assert search.parse_search_time('2025-11-21', end=True) == '2025-11-22 00:00:00'
+    assert search.parse_search_time(' 2025-11-21 18:30 ', end=True) == '2025-11-21 18:30:00'
+    with pytest.raises(ValueError):
+        search.parse_search_time('21.11.2025')
+
+
+@pytest.mark.parametrize('fts', [True, False])
+def test_find_menu_ids(cafe_db, monkeypatch, fts):
+    if not fts:
+        monkeypatch.setitem(statements.STATEMENTS, 'search.has_fts', "SELECT 1 WHERE 0")
+    connection = statements.get_connection()
+    assert search.find_menu_ids(connection, 'бор') == [1]
+    assert search.find_menu_ids(connection, 'ТОРТ') == [3]
+    assert search.find_menu_ids(connection, 'чай торт') == []
+
+
+def test_search_orders_pages_newest_first(orders):
+    assert all_pages(2) == orders[::-1]
+    assert all_pages(2, dish='чай') == [orders[5], orders[3], orders[1]]
+    assert all_pages(10, dish='торт', table_number=1) == [orders[0]]
+
+
+def test_search_orders_includes_archives(orders):
+    archive.archive_orders(days=25)
+    assert all_pages(2) == orders[:3:-1]
+
+    assert all_pages(2, include_archive=True) == orders[::-1]
+    assert all_pages(1, dish='торт', include_archive=True) == [orders[1], orders[0]]
+
+    render, close = search.order_lines_source()
+    try:
+        order = search.search_orders(dish='торт', include_archive=True)[0][-1]
+        assert any('Торт' in line for line in render(order))
+    finally:
+        close()